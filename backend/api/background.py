@@ -0,0 +1,49 @@
+"""
+Periodic background jobs and long-running workers.
+
+Jobs run on daemon threads started from the application lifespan, so they
+never block request handling and stop with the process. A failing run is
+logged and retried on the next interval. Workers started with start_worker
+run their own loop and return once background_jobs_stopped().
+"""
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger("background")
+
+_stop = threading.Event()
+_threads: List[threading.Thread] = []
+
+
+def run_periodically(name: str, interval_seconds: float, job: Callable[[], None]) -> threading.Thread:
+    """Start a daemon thread calling job every interval_seconds until stop_background_jobs()"""
+    def loop():
+        while not _stop.wait(interval_seconds):
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Background job {name} failed: {e}", exc_info=True)
+
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    _threads.append(thread)
+    return thread
+
+
+def start_worker(name: str, run: Callable[[], None]) -> threading.Thread:
+    """Start a daemon thread running run, which should return once background_jobs_stopped()"""
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    _threads.append(thread)
+    return thread
+
+
+def background_jobs_stopped() -> bool:
+    """Whether stop_background_jobs() was called; workers check it between units of work"""
+    return _stop.is_set()
+
+
+def stop_background_jobs() -> None:
+    """Signal every periodic job and worker to stop after its current run"""
+    _stop.set()
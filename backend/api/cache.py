@@ -0,0 +1,123 @@
+"""
+In-process result cache for public, read-heavy catalog endpoints.
+
+Entries are evicted least-recently-used once the cache is full and expire after
+a TTL. Keys are tuples whose first element names the kind of result (its
+scope), e.g. ("search_item", item_id). An item write published through
+api.events drops only the entries it can change:
+
+- item listings carry the catalog version in their keys, so a write moves them
+  to new keys and the old entries just age out; nothing is dropped,
+- the single item lookup of the written item is dropped,
+- search pages are dropped only when the write changed a field they filter or
+  sort on, since that can move the item between pages. Pages that filter by
+  quantity or sort by sales are kept apart ("search_items_by_stock"), so a
+  sale that only takes stock drops just those; the rest show the old stock
+  until their TTL runs out.
+
+Changes are detected against the item's values as last published in this
+process; the first write of an item seen here drops every search page. The
+worker that handled the write never serves stale listings or lookups; other
+worker processes catch up within the TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from api.events import on_item_change
+
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", 1024))
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", 30))
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped per scope and per key by invalidation so results computed
+        # before it are not stored after it
+        self._generations: Dict[Hashable, int] = {}
+        self._key_generations: Dict[Hashable, int] = {}
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            generation = self._generation(key)
+
+        value = compute()
+
+        if self.max_entries > 0 and self.ttl_seconds > 0:
+            with self._lock:
+                if generation == self._generation(key):
+                    self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry for key"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._key_generations[key] = self._key_generations.get(key, 0) + 1
+
+    def invalidate_scope(self, scope: Hashable) -> None:
+        """Drop every entry of a scope"""
+        with self._lock:
+            for key in [key for key in self._entries if _scope(key) == scope]:
+                del self._entries[key]
+            self._bump(scope)
+
+    def _bump(self, scope: Hashable) -> None:
+        self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        return self._generations.get(_scope(key), 0), self._key_generations.get(key, 0)
+
+
+def _scope(key: Hashable) -> Hashable:
+    """First element of a tuple key, the key itself otherwise"""
+    return key[0] if isinstance(key, tuple) and key else key
+
+
+# Shared by the public item search and item listing endpoints
+catalog_cache = TTLCache(CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL_SECONDS)
+
+
+# Item fields that decide which search pages hold an item and where
+SEARCH_FIELDS = ("name", "description", "category", "price", "status", "seller_user_id", "listed_at")
+# Item fields only the "search_items_by_stock" pages filter or sort on
+STOCK_FIELDS = ("quantity", "units_sold")
+
+# (search field values, stock field values) of each item as last published here
+_published: Dict[int, tuple] = {}
+_published_lock = threading.Lock()
+
+
+@on_item_change
+def _invalidate_catalog_cache(item) -> None:
+    catalog_cache.invalidate(("search_item", item.item_id))
+
+    values = (
+        tuple(getattr(item, field) for field in SEARCH_FIELDS),
+        tuple(getattr(item, field) for field in STOCK_FIELDS)
+    )
+    with _published_lock:
+        previous = _published.get(item.item_id)
+        _published[item.item_id] = values
+    if previous is None or previous[0] != values[0]:
+        catalog_cache.invalidate_scope("search_items")
+        catalog_cache.invalidate_scope("search_items_by_stock")
+    elif previous[1] != values[1]:
+        catalog_cache.invalidate_scope("search_items_by_stock")
@@ -4,7 +4,8 @@ import logging
 import subprocess
 import sys
 import importlib.util
-from typing import Generator
+from contextlib import contextmanager
+from typing import Generator, Iterator
 
 from sqlmodel import Session, SQLModel, create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
@@ -126,6 +127,21 @@ def create_db_engine(max_retries=5, retry_interval=5):
 create_db_engine()
 
 def get_db() -> Generator[Session, None, None]:
+    if engine is None:
+        raise RuntimeError("Database engine is not initialized.")
+    db = Session(engine)
+    try:
+        yield db
+    except Exception as e:
+        logger.error(f"Session error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Session for work that outlives a request's get_db session, such as streamed responses"""
     if engine is None:
         raise RuntimeError("Database engine is not initialized.")
     db = Session(engine)
@@ -0,0 +1,52 @@
+"""
+Item change notifications.
+
+Write paths publish the items they changed once the change is committed, and
+in-process read structures (result caches, search indexes) subscribe to stay
+current without polling the database.
+
+Listeners run synchronously in the writing request; a failing listener is
+logged and never fails the write that triggered it. Batch listeners are called
+once per publish with all of its items, for work that doesn't depend on how
+many items a write touched.
+"""
+import logging
+from typing import Callable, List, Sequence
+
+from api.models.item.model import Item
+
+logger = logging.getLogger("events")
+
+ItemListener = Callable[[Item], None]
+ItemBatchListener = Callable[[Sequence[Item]], None]
+
+_item_listeners: List[ItemListener] = []
+_batch_listeners: List[ItemBatchListener] = []
+
+
+def on_item_change(listener: ItemListener) -> ItemListener:
+    """Register a listener called with each item after it was created, updated or sold"""
+    _item_listeners.append(listener)
+    return listener
+
+
+def on_item_batch_change(listener: ItemBatchListener) -> ItemBatchListener:
+    """Register a listener called once with all items of each publish"""
+    _batch_listeners.append(listener)
+    return listener
+
+
+def publish_item_change(*items: Item) -> None:
+    """Notify all listeners about committed changes to the given items, still attached to the writer's session"""
+    if items:
+        for listener in _batch_listeners:
+            try:
+                listener(items)
+            except Exception as e:
+                logger.error(f"Item batch listener {listener.__name__} failed for {len(items)} items: {e}", exc_info=True)
+    for item in items:
+        for listener in _item_listeners:
+            try:
+                listener(item)
+            except Exception as e:
+                logger.error(f"Item change listener {listener.__name__} failed for item {item.item_id}: {e}", exc_info=True)
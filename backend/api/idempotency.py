@@ -0,0 +1,209 @@
+"""
+Idempotency-Key support for POST endpoints that move money.
+
+A client sends a unique Idempotency-Key header with a purchase, checkout,
+transfer or deposit and reuses it when it retries after a timeout. The first
+request with a key reserves it, runs the write and stores the response; a
+retry with the same key and body gets that stored response back from one
+primary key lookup, without running the write again or touching user rows.
+
+Keys are scoped to the user and expire after IDEMPOTENCY_KEY_TTL_SECONDS.
+If the write fails the reservation is released, so the client can retry
+with the same key. A reservation is also only a lease of
+IDEMPOTENCY_KEY_LEASE_SECONDS: if the worker dies mid-request, or storing the
+response fails, a retry takes the key over once the lease has run out instead
+of getting 409 until the key expires.
+
+Key operations run on the request's own session, each committed on its own,
+so a request holds one pooled connection however many retries pile up.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Type
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from api.db import engine
+from api.models.idempotency_key.model import IdempotencyKey
+
+logger = logging.getLogger("idempotency")
+
+IDEMPOTENCY_KEY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 86400))
+IDEMPOTENCY_KEY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_PURGE_SECONDS", 3600))
+IDEMPOTENCY_KEY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_LEASE_SECONDS", 300))
+
+# Marks responses replayed from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_keys = IdempotencyKey.__table__
+
+
+def _request_hash(endpoint: str, request_data: Any) -> str:
+    """SHA-256 of the endpoint and its request body, so a key can't be reused for a different request"""
+    body = json.dumps(jsonable_encoder(request_data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\n{body}".encode()).hexdigest()
+
+
+def _find(db: Session, user_id: int, key: str):
+    """The key's live row, unless it's a reservation whose lease ran out"""
+    statement = select(_keys.c.request_hash, _keys.c.status_code, _keys.c.response_body).where(
+        _keys.c.user_id == user_id,
+        _keys.c.idempotency_key == key,
+        _keys.c.expires_at > func.now(),
+        or_(_keys.c.response_body.is_not(None), _keys.c.locked_until > func.now())
+    )
+    stored = db.execute(statement).first()
+    db.commit()
+    return stored
+
+
+def _reserve(db: Session, user_id: int, key: str, request_hash: str) -> bool:
+    """Claim the key for a new request, taking over an expired row or lease; False if it's in use"""
+    now = datetime.now(timezone.utc)
+    statement = insert(_keys).values(
+        user_id=user_id,
+        idempotency_key=key,
+        request_hash=request_hash,
+        locked_until=now + timedelta(seconds=IDEMPOTENCY_KEY_LEASE_SECONDS),
+        expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[_keys.c.user_id, _keys.c.idempotency_key],
+        set_={
+            "request_hash": statement.excluded.request_hash,
+            "status_code": None,
+            "response_body": None,
+            "created_at": func.now(),
+            "locked_until": statement.excluded.locked_until,
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=or_(
+            _keys.c.expires_at <= func.now(),
+            _keys.c.response_body.is_(None) & (_keys.c.locked_until <= func.now())
+        )
+    ).returning(_keys.c.user_id)
+    reserved = db.execute(statement).first() is not None
+    db.commit()
+    return reserved
+
+
+def _store(db: Session, user_id: int, key: str, status_code: int, body: Any) -> None:
+    statement = update(_keys).where(
+        _keys.c.user_id == user_id,
+        _keys.c.idempotency_key == key
+    ).values(status_code=status_code, response_body=body, locked_until=None)
+    db.execute(statement)
+    db.commit()
+
+
+def _release(db: Session, user_id: int, key: str) -> None:
+    # The failed write may have left the session's transaction aborted
+    db.rollback()
+    statement = delete(_keys).where(
+        _keys.c.user_id == user_id,
+        _keys.c.idempotency_key == key,
+        _keys.c.response_body.is_(None)
+    )
+    db.execute(statement)
+    db.commit()
+
+
+def _replay(stored, request_hash: str) -> JSONResponse:
+    """The stored response for a retry, or why the key can't be used for this request"""
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    if stored.response_body is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed"
+        )
+    return JSONResponse(
+        content=stored.response_body,
+        status_code=stored.status_code,
+        headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def run_idempotent(
+    db: Session,
+    key: Optional[str],
+    user_id: int,
+    endpoint: str,
+    request_data: Any,
+    handler: Callable[[], Any],
+    response_model: Type[BaseModel],
+    status_code: int = status.HTTP_200_OK
+) -> Any:
+    """
+    Run handler at most once per Idempotency-Key.
+
+    Args:
+        db: The request's database session; handler is expected to commit its own write
+        key: The Idempotency-Key header, or None to just run handler
+        user_id: ID of the user sending the request
+        endpoint: Name of the endpoint, part of what the key is bound to
+        request_data: Request body the key is bound to
+        handler: Performs the write and returns the result
+        response_model: Schema the result is serialized with
+        status_code: Status code of a successful response
+
+    Returns:
+        The handler's result without a key, otherwise the serialized response
+        (the stored one for a retry)
+
+    Raises:
+        HTTPException: 409 while the first request with the key still runs,
+                      422 if the key was used for a different request
+    """
+    if key is None:
+        return handler()
+
+    request_hash = _request_hash(endpoint, request_data)
+    stored = _find(db, user_id, key)
+    if stored is not None:
+        return _replay(stored, request_hash)
+    if not _reserve(db, user_id, key, request_hash):
+        # Another request reserved the key in the meantime
+        stored = _find(db, user_id, key)
+        if stored is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed"
+            )
+        return _replay(stored, request_hash)
+
+    try:
+        result = handler()
+    except Exception:
+        _release(db, user_id, key)
+        raise
+
+    body = jsonable_encoder(response_model.model_validate(result, from_attributes=True))
+    try:
+        _store(db, user_id, key, status_code, body)
+    except Exception as e:
+        # The write went through, so answer it; a retry sees the key as in progress until the lease runs out
+        db.rollback()
+        logger.error(f"Storing the response for Idempotency-Key {key!r} failed: {e}")
+    return JSONResponse(content=body, status_code=status_code)
+
+
+def purge_expired_idempotency_keys() -> int:
+    """Delete expired keys, returning how many were removed"""
+    with engine.begin() as conn:
+        removed = conn.execute(delete(_keys).where(_keys.c.expires_at <= func.now())).rowcount
+    if removed:
+        logger.info(f"Purged {removed} expired idempotency keys")
+    return removed
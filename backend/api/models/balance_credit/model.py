@@ -0,0 +1,58 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, BigInteger, Integer, ForeignKey, DateTime, func
+from typing import Optional
+from datetime import datetime
+
+
+class BalanceCredit(SQLModel, table = True):
+    """ Represents a balance credit not yet folded into users.cash_balance
+
+    Attributes:
+        credit_id (int): Primary key of the credit (BigSerial)
+        user_id (int): Foreign key of the user being credited
+        amount (float): Amount credited (12, 2)
+        transaction_id (int): Foreign key of the sale that earned the credit, null for transfers
+        created_at (datetime): Timestamp of the credit (timestamp)
+    """
+    __tablename__ = "balance_credits"
+
+    # Credit_id, Primary_key
+    credit_id: Optional[int] = Field(
+        default = None,
+        sa_column = Column(BigInteger, primary_key = True)
+    )
+
+    # User_id, foreign_key users(user_id), not null
+    user_id: int = Field(
+        sa_column = Column(
+            Integer,
+            ForeignKey("users.user_id", ondelete="CASCADE"),
+            nullable = False
+        )
+    )
+
+    # Amount, (12, 2), amount > 0, not null
+    amount: float = Field(
+        max_digits = 12,
+        decimal_places = 2,
+        gt = 0,
+        nullable = False
+    )
+
+    # Transaction_id, foreign_key transactions(transaction_id), null for transfers
+    transaction_id: Optional[int] = Field(
+        default = None,
+        sa_column = Column(
+            Integer,
+            ForeignKey("transactions.transaction_id"),
+            nullable = True
+        )
+    )
+
+    # Created_at, timestamp, default now()
+    created_at: datetime = Field(
+        sa_column = Column(
+            DateTime(timezone = True),
+            server_default = func.now()
+        )
+    )
@@ -0,0 +1,79 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Integer, SmallInteger, String, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Any, Optional
+from datetime import datetime
+
+
+class IdempotencyKey(SQLModel, table = True):
+    """ Represents a client-supplied Idempotency-Key inside the database
+
+    Attributes:
+        user_id (int): Foreign key of the user who sent the request, part of the primary key
+        idempotency_key (str): The Idempotency-Key header value, part of the primary key (255)
+        request_hash (str): SHA-256 of the endpoint and request body the key was first used with (64)
+        status_code (int): Status code of the stored response, null while the request runs
+        response_body (dict): Stored response body, null while the request runs (jsonb)
+        locked_until (datetime): End of the running request's lease, after which a retry may take the key over (timestamp)
+        created_at (datetime): Timestamp the key was reserved (timestamp)
+        expires_at (datetime): Timestamp after which the key may be reused (timestamp)
+    """
+    __tablename__ = "idempotency_keys"
+
+    # User_id, foreign_key users(user_id), primary key
+    user_id: int = Field(
+        sa_column = Column(
+            Integer,
+            ForeignKey("users.user_id", ondelete="CASCADE"),
+            primary_key = True
+        )
+    )
+
+    # Idempotency_key, varchar(255), primary key
+    idempotency_key: str = Field(
+        sa_column = Column(
+            String(255),
+            primary_key = True
+        )
+    )
+
+    # Request_hash, char(64), not null
+    request_hash: str = Field(
+        max_length = 64,
+        nullable = False
+    )
+
+    # Status_code, smallint, null until the response is stored
+    status_code: Optional[int] = Field(
+        default = None,
+        sa_column = Column(SmallInteger, nullable = True)
+    )
+
+    # Response_body, jsonb, null until the response is stored
+    response_body: Optional[Any] = Field(
+        default = None,
+        sa_column = Column(JSONB, nullable = True)
+    )
+
+    # Locked_until, timestamp, null once the response is stored
+    locked_until: Optional[datetime] = Field(
+        default = None,
+        sa_column = Column(DateTime(timezone = True), nullable = True)
+    )
+
+    # Created_at, timestamp, default now()
+    created_at: datetime = Field(
+        sa_column = Column(
+            DateTime(timezone = True),
+            server_default = func.now(),
+            nullable = False
+        )
+    )
+
+    # Expires_at, timestamp, not null
+    expires_at: datetime = Field(
+        sa_column = Column(
+            DateTime(timezone = True),
+            nullable = False
+        )
+    )
@@ -1,5 +1,6 @@
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Column, Computed, Integer, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from enum import Enum
 from typing import Optional
 from datetime import datetime
@@ -23,6 +24,7 @@ class Item(SQLModel, table=True):
         price (float): Price of the item (10, 2)
         quantity (int): Quantity of the item in stock (default 1, quantity >= 0)
         status (ItemStatus): Status of the item (not null)
+        units_sold (int): Total quantity sold across all transactions (default 0)
         listed_at (datetime): Timestamp of when the item was listed (timestamp)
         updated_at (datetime): Timestamp of when the item was last updated (timestamp)
     """
@@ -83,6 +85,12 @@ class Item(SQLModel, table=True):
         nullable = False
     )
     
+    # Units_sold, default 0, not null; kept in step with transactions for best-selling ordering
+    units_sold: int = Field(
+        default = 0,
+        nullable = False
+    )
+    
     # Listed_at, timestamp
     listed_at: datetime = Field(
         sa_column = Column(
@@ -98,4 +106,21 @@ class Item(SQLModel, table=True):
             server_default = func.now(),
             onupdate = func.now()
         )
-    )
\ No newline at end of file
+    )
+
+
+# Search_vector, generated tsvector over name (A), category (B) and description (C).
+# Appended to the table after mapping so it exists in the schema but is never
+# loaded with Item rows; search queries reference it as Item.__table__.c.search_vector.
+Item.__table__.append_column(
+    Column(
+        "search_vector",
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(category, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')",
+            persisted = True
+        )
+    )
+)
@@ -0,0 +1,133 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque url-safe token holding the sort key values of the last
+row of a page (always ending with the row id as a tie-breaker) plus the name of
+the ordering it belongs to. The next page is fetched with a row comparison
+`(key, id) > (:key, :id)`, so every page costs one index range scan no matter
+how deep the caller pages, unlike OFFSET.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _encode_value(value: Any) -> Any:
+    """Tag values JSON can't carry so they decode back to the same type"""
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(ordering: str, values: Sequence[Any]) -> str:
+    """Encode the sort key values of a row into an opaque cursor token"""
+    payload = json.dumps([ordering, [_encode_value(value) for value in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, ordering: str, key_count: int) -> List[Any]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Raises:
+        HTTPException: If the token is malformed or was issued for another ordering
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_ordering, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(value) for value in values]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    if cursor_ordering != ordering or len(values) != key_count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested ordering"
+        )
+    return values
+
+
+def apply_keyset(
+    query: Query,
+    ordering: str,
+    sort_keys: Sequence[Any],
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Query:
+    """Restrict a query to the rows after a cursor and order it by the sort keys"""
+    keys = tuple_(*sort_keys)
+
+    if cursor:
+        values = tuple_(*decode_cursor(cursor, ordering, len(sort_keys)))
+        query = query.filter(keys < values if descending else keys > values)
+
+    return query.order_by(*[key.desc() if descending else key.asc() for key in sort_keys])
+
+
+def paginate(
+    query: Query,
+    ordering: str,
+    sort_keys: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one keyset page of a query.
+
+    Args:
+        query: Filtered query; must not already be ordered or limited
+        ordering: Name of the ordering, embedded in cursors so they can't be mixed
+        sort_keys: Columns/expressions to order by, ending with a unique id column
+        cursor: Cursor returned with the previous page, if any
+        limit: Maximum number of rows in the page
+        descending: Walk the keys in descending instead of ascending order
+
+    Returns:
+        (rows, next_cursor) where rows have the same shape as query.all() and
+        next_cursor is None on the last page
+    """
+    entity_count = len(query.column_descriptions)
+
+    query = apply_keyset(query, ordering, sort_keys, cursor, descending)
+    query = query.add_columns(*sort_keys)
+
+    # Fetch one extra row to learn whether another page exists
+    results = query.limit(limit + 1).all()
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(ordering, results[-1][entity_count:])
+
+    if entity_count == 1:
+        rows = [row[0] for row in results]
+    else:
+        rows = [tuple(row[:entity_count]) for row in results]
+    return rows, next_cursor
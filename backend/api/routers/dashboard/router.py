@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from api.db import get_db
 from api.dependencies import get_current_user
 from api.models.user.model import User, UserRole
+from api.routers.transactions.balance_credits import user_balance
 from api.routers.dashboard.schemas import (
     DashboardSummary, 
     TimeSeriesData, 
@@ -33,11 +34,17 @@ router = APIRouter(
 
 # User profile route moved from auth
 @router.get("/profile", response_model=UserProfile)
-def get_user_profile(current_user: User = Depends(get_current_user)):
+def get_user_profile(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     """
     Get the current authenticated user's profile information
+    
+    cash_balance includes sale and transfer credits not yet folded into the stored balance.
     """
-    return current_user
+    profile = UserProfile.model_validate(current_user, from_attributes=True)
+    return profile.model_copy(update={"cash_balance": user_balance(db, current_user.user_id)})
 
 @router.get("/summary", response_model=DashboardSummary)
 async def dashboard_summary(
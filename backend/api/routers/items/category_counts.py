@@ -0,0 +1,141 @@
+"""
+In-memory per-category counts of for-sale, in-stock items.
+
+The category of every counted item is remembered, so an item change event
+(which carries only the item's new state) becomes a -1 on the category it was
+counted under and a +1 on the one it belongs to now. The counts are loaded at
+startup and rebuilt periodically to pick up writes made by other worker
+processes; reconcile() additionally reports how far they had drifted.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from api.events import on_item_change
+from api.models.item.model import Item, item_status
+
+logger = logging.getLogger("category_counts")
+
+CATEGORY_COUNTS_REFRESH_SECONDS = float(os.getenv("CATEGORY_COUNTS_REFRESH_SECONDS", 300))
+
+
+def _counted_category(item: Item) -> Optional[str]:
+    """Category the item is counted under, or None if it isn't counted"""
+    if item.status == item_status.for_sale and item.quantity > 0:
+        return item.category
+    return None
+
+
+class CategoryCounts:
+    """Number of for-sale, in-stock items per category"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._item_categories: Dict[int, str] = {}
+        # Bumped whenever a count changes, for conditional GETs
+        self.version = 0
+        # Items written while a rebuild reads the database, re-applied after it swaps in
+        self._pending: Optional[Dict[int, Item]] = None
+
+    def categories(self) -> List[Dict]:
+        """Categories with at least one counted item, by name"""
+        with self._lock:
+            return [{"name": name, "item_count": count} for name, count in sorted(self._counts.items())]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def load(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Replace the counts with (item_id, category) rows of the counted items"""
+        item_categories = dict(rows)
+        counts: Dict[str, int] = {}
+        for category in item_categories.values():
+            counts[category] = counts.get(category, 0) + 1
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._counts = counts
+            self._item_categories = item_categories
+            self.version += 1
+        for item in (pending or {}).values():
+            self.patch(item)
+
+    def begin_rebuild(self) -> None:
+        """Start recording item writes so a rebuild in progress doesn't lose them"""
+        with self._lock:
+            self._pending = {}
+
+    def patch(self, item: Item) -> None:
+        """Move one item's count to the category it's counted under after a write"""
+        category = _counted_category(item)
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending[item.item_id] = item
+            previous = self._item_categories.pop(item.item_id, None)
+            if previous != category:
+                self.version += 1
+            if previous is not None:
+                self._counts[previous] -= 1
+                if not self._counts[previous]:
+                    del self._counts[previous]
+            if category is not None:
+                self._item_categories[item.item_id] = category
+                self._counts[category] = self._counts.get(category, 0) + 1
+
+
+category_counts = CategoryCounts()
+
+
+def _read_counted_items(db: Session) -> List[Tuple[int, str]]:
+    statement = select(Item.item_id, Item.category).where(
+        Item.status == item_status.for_sale,
+        Item.quantity > 0,
+        Item.category != None
+    )
+    return db.exec(statement).all()
+
+
+def rebuild_category_counts(db: Session) -> None:
+    """Reload the category counts from every counted item"""
+    category_counts.begin_rebuild()
+    rows = _read_counted_items(db)
+    category_counts.load(rows)
+    logger.info(f"Category counts loaded for {len(rows)} items")
+
+
+def reconcile_category_counts(db: Session) -> List[Dict]:
+    """
+    Rebuild the category counts and report where the in-memory counts had drifted.
+
+    Returns:
+        One {"name", "counted", "actual"} entry per category whose in-memory
+        count differed from the database
+    """
+    counted = category_counts.counts()
+    category_counts.begin_rebuild()
+    rows = _read_counted_items(db)
+    category_counts.load(rows)
+
+    actual: Dict[str, int] = {}
+    for _, category in rows:
+        actual[category] = actual.get(category, 0) + 1
+
+    drift = [
+        {"name": name, "counted": counted.get(name, 0), "actual": actual.get(name, 0)}
+        for name in sorted(counted.keys() | actual.keys())
+        if counted.get(name, 0) != actual.get(name, 0)
+    ]
+    if drift:
+        logger.warning(f"Category counts had drifted for {len(drift)} categories: {drift}")
+    return drift
+
+
+@on_item_change
+def _patch_category_counts(item: Item) -> None:
+    category_counts.patch(item)
@@ -1,32 +1,53 @@
 from sqlmodel import Session, select, func
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 from api.models.item.model import Item, item_status
+from api.pagination import apply_keyset, encode_cursor
 
+# Most item IDs a widget can ask to leave out of featured/recent items
+MAX_EXCLUDE_IDS = 20
 
-def get_all_items(db: Session, skip: int = 0, limit: Optional[int] = None):
+# Listings are walked newest first on (listed_at, item_id), served by the
+# partial idx_items_for_sale_listed_at / idx_items_for_sale_category_listed_at indexes
+LISTING_KEYS = [Item.listed_at, Item.item_id]
+
+
+def _listing_page(db: Session, statement, cursor: Optional[str], skip: int, limit: int) -> Tuple[List[Item], Optional[str]]:
+    """Fetch one newest-first page of a listing after cursor, with the cursor of the next page"""
+    statement = apply_keyset(statement, "listed_at", LISTING_KEYS, cursor, descending=True)
+    if skip:
+        statement = statement.offset(skip)
+
+    # Fetch one extra row to learn whether another page exists
+    items = db.exec(statement.limit(limit + 1)).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor("listed_at", [items[-1].listed_at, items[-1].item_id])
+
+
+def get_all_items(db: Session, cursor: Optional[str] = None, skip: int = 0, limit: int = 100):
     """
-    Get all active items that are for sale
+    Get a page of all active items that are for sale, newest first
+
+    Returns:
+        (items, next_cursor) where next_cursor is None on the last page
     """
     statement = select(Item).where(
         Item.status == item_status.for_sale,
         Item.quantity > 0
-    ).offset(skip)
-    
-    if limit is not None:
-        statement = statement.limit(limit)
-    
-    return db.exec(statement).all()
+    )
+    return _listing_page(db, statement, cursor, skip, limit)
 
 
 def get_featured_items(db: Session, limit: Optional[int] = None):
     """
-    Get featured items - currently implements as highest priced items
+    Get featured items - currently implements as highest priced items, newest first among equal prices
     """
     statement = select(Item).where(
         Item.status == item_status.for_sale,
         Item.quantity > 0
-    ).order_by(Item.price.desc())
+    ).order_by(Item.price.desc(), Item.item_id.desc())
     
     if limit is not None:
         statement = statement.limit(limit)
@@ -34,22 +55,28 @@ def get_featured_items(db: Session, limit: Optional[int] = None):
     return db.exec(statement).all()
 
 
-def get_recent_items(db: Session, days: int = 7, limit: Optional[int] = None):
+def recent_window_start(days: int) -> datetime:
+    """Start of the recent items window, whole minutes so responses stay the same within a minute"""
+    return (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0)
+
+
+def get_recent_items(db: Session, days: int = 7, cursor: Optional[str] = None, limit: int = 100, exclude_ids: Sequence[int] = ()):
     """
-    Get items listed within the last specified days
+    Get a page of items listed within the last specified days, newest first, leaving out exclude_ids
+
+    Returns:
+        (items, next_cursor) where next_cursor is None on the last page
     """
-    recent_date = datetime.now() - timedelta(days=days)
+    recent_date = recent_window_start(days)
     
     statement = select(Item).where(
         Item.status == item_status.for_sale,
         Item.quantity > 0,
         Item.listed_at >= recent_date
-    ).order_by(Item.listed_at.desc())
-    
-    if limit is not None:
-        statement = statement.limit(limit)
-    
-    return db.exec(statement).all()
+    )
+    if exclude_ids:
+        statement = statement.where(Item.item_id.not_in(exclude_ids))
+    return _listing_page(db, statement, cursor, 0, limit)
 
 
 def get_unique_categories(db: Session):
@@ -69,17 +96,16 @@ def get_unique_categories(db: Session):
     return [{"name": category, "item_count": count} for category, count in results]
 
 
-def get_items_by_category(db: Session, category: str, skip: int = 0, limit: Optional[int] = None):
+def get_items_by_category(db: Session, category: str, cursor: Optional[str] = None, skip: int = 0, limit: int = 100):
     """
-    Get items by category
+    Get a page of items in a category, newest first
+
+    Returns:
+        (items, next_cursor) where next_cursor is None on the last page
     """
     statement = select(Item).where(
         Item.status == item_status.for_sale,
         Item.quantity > 0,
         Item.category == category
-    ).offset(skip)
-    
-    if limit is not None:
-        statement = statement.limit(limit)
-    
-    return db.exec(statement).all()
\ No newline at end of file
+    )
+    return _listing_page(db, statement, cursor, skip, limit)
\ No newline at end of file
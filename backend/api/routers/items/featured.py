@@ -0,0 +1,131 @@
+"""
+In-memory top-K of featured items.
+
+Featured items are the highest priced for-sale, in-stock items. Instead of
+sorting every such item on each home page load, the best FEATURED_CAPACITY of
+them are kept in memory, ordered by rank, and patched from api.events when an
+item is created, updated or sells out.
+
+Every eligible item that isn't held ranks below a boundary (the best item left
+out at the last load), so writes that rank an item above the boundary are
+applied in memory and everything else can be ignored. When sell-outs leave
+fewer items above the boundary than a request asks for, the set is reloaded
+from the database. It is also reloaded periodically so writes made by other
+worker processes show up.
+"""
+import logging
+import os
+import threading
+from bisect import insort
+from typing import Collection, Dict, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from api.events import on_item_change
+from api.models.item.model import Item, item_status
+from api.routers.items.crud import get_featured_items, MAX_EXCLUDE_IDS
+from api.routers.items.schemas import ItemResponse
+
+logger = logging.getLogger("featured")
+
+FEATURED_ITEMS_REFRESH_SECONDS = float(os.getenv("FEATURED_ITEMS_REFRESH_SECONDS", 300))
+
+# Items held in memory; enough for the largest limit /items/featured accepts with every exclusion
+FEATURED_CAPACITY = 100 + MAX_EXCLUDE_IDS
+
+# Smaller ranks first: highest price, then newest item
+Rank = Tuple[float, int]
+
+
+def _rank(item) -> Rank:
+    return -float(item.price), -item.item_id
+
+
+def _is_featured(item: Item) -> bool:
+    return item.status == item_status.for_sale and item.quantity > 0
+
+
+class FeaturedItems:
+    """The FEATURED_CAPACITY best ranked featured items, as response snapshots"""
+
+    def __init__(self, capacity: int = FEATURED_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._ranks: List[Rank] = []
+        self._items: Dict[int, Tuple[Rank, ItemResponse]] = {}
+        # Rank of the best eligible item not held, None when every eligible item is held
+        self._boundary: Optional[Rank] = None
+        self._loaded = False
+        # Bumped whenever the held set changes, for conditional GETs
+        self.version = 0
+        # Items written while a rebuild reads the database, re-applied after it swaps in
+        self._pending: Optional[Dict[int, Item]] = None
+
+    def top(self, limit: int, exclude_ids: Collection[int] = ()) -> Optional[List[ItemResponse]]:
+        """The best limit featured items not in exclude_ids, or None when the held set can't answer for that many"""
+        with self._lock:
+            if not self._loaded or (self._boundary is not None and len(self._ranks) < limit + len(exclude_ids)):
+                return None
+            item_ids = (-rank[1] for rank in self._ranks)
+            return [self._items[item_id][1] for item_id in item_ids if item_id not in exclude_ids][:limit]
+
+    def load(self, items: List[Item]) -> None:
+        """Replace the set with items ordered by rank, holding one more than capacity if there are more"""
+        held = items[:self.capacity]
+        boundary = _rank(items[self.capacity]) if len(items) > self.capacity else None
+        snapshots = {item.item_id: (_rank(item), ItemResponse.model_validate(item, from_attributes=True)) for item in held}
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._items = snapshots
+            self._ranks = sorted(rank for rank, _ in snapshots.values())
+            self._boundary = boundary
+            self._loaded = True
+            self.version += 1
+        for item in (pending or {}).values():
+            self.patch(item)
+
+    def begin_rebuild(self) -> None:
+        """Start recording item writes so a rebuild in progress doesn't lose them"""
+        with self._lock:
+            self._pending = {}
+
+    def patch(self, item: Item) -> None:
+        """Bring one item up to date after a write"""
+        rank = _rank(item)
+        snapshot = ItemResponse.model_validate(item, from_attributes=True) if _is_featured(item) else None
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending[item.item_id] = item
+            held = self._items.pop(item.item_id, None)
+            if held is not None:
+                self._ranks.remove(held[0])
+                self.version += 1
+            if snapshot is None or (self._boundary is not None and rank >= self._boundary):
+                return
+
+            self._items[item.item_id] = (rank, snapshot)
+            insort(self._ranks, rank)
+            self.version += 1
+            if len(self._ranks) > self.capacity:
+                # The worst held item drops out and becomes the best one not held
+                self._boundary = self._ranks.pop()
+                del self._items[-self._boundary[1]]
+
+
+featured_items = FeaturedItems()
+
+
+def rebuild_featured_items(db: Session) -> List[Item]:
+    """Reload the featured set from the best ranked featured items, returning the items read"""
+    featured_items.begin_rebuild()
+    items = get_featured_items(db, limit=featured_items.capacity + 1)
+    featured_items.load(items)
+    logger.info(f"Featured items loaded with {min(len(items), featured_items.capacity)} items")
+    return items
+
+
+@on_item_change
+def _patch_featured_items(item: Item) -> None:
+    featured_items.patch(item)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlmodel import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
 import sys
 from pathlib import Path
@@ -9,18 +9,24 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
+from api.cache import catalog_cache
 from api.db import get_db
+from api.dependencies import get_current_user
 from api.models.item.model import Item, item_status
+from api.models.user.model import User, UserRole
 
 # Import schemas
-from .schemas import ItemResponse, CategoryResponse
+from .schemas import ItemResponse, CategoryResponse, CategoryDriftResponse
+from .featured import featured_items, rebuild_featured_items
+from .category_counts import category_counts, reconcile_category_counts
+from .conditional import PROCESS_TOKEN, catalog_version, make_etag, is_not_modified, set_validators, not_modified
 
 # Import CRUD operations
 from .crud import (
     get_all_items,
-    get_featured_items,
     get_recent_items,
-    get_unique_categories,
+    recent_window_start,
+    MAX_EXCLUDE_IDS,
     get_items_by_category
 )
 
@@ -31,50 +37,159 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+
+def _item_responses(items: List[Item]) -> List[ItemResponse]:
+    """Convert items to response models so cached results don't hold ORM instances"""
+    return [ItemResponse.model_validate(item, from_attributes=True) for item in items]
+
+
+def _item_page(page: Tuple[List[Item], Optional[str]]) -> Tuple[List[ItemResponse], Optional[str]]:
+    items, next_cursor = page
+    return _item_responses(items), next_cursor
+
+
+def _listing_response(response: Response, page: Tuple[List[ItemResponse], Optional[str]]) -> List[ItemResponse]:
+    """Return a listing page's items, passing the next page's cursor in the X-Next-Cursor header"""
+    items, next_cursor = page
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+
+def _excluded_ids(exclude_ids: Optional[List[int]], exclude_id: Optional[int]) -> Tuple[int, ...]:
+    """Distinct item IDs to leave out, from exclude_ids and the older single exclude_id parameter"""
+    excluded = set(exclude_ids or ())
+    if exclude_id is not None:
+        excluded.add(exclude_id)
+    if len(excluded) > MAX_EXCLUDE_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_EXCLUDE_IDS} item IDs can be excluded"
+        )
+    return tuple(sorted(excluded))
+
+
+def _conditional_listing(request: Request, response: Response, db: Session, key: tuple, compute, last_modified: bool = True):
+    """
+    Serve a database-backed listing page unless the client's copy is current.
+
+    The catalog version is part of both the ETag and the cache key, so a
+    cached page is never sent under a newer version's ETag. Listings that also
+    change with time pass last_modified=False and are validated by ETag only.
+    """
+    updated_at, writes = catalog_version(db)
+    key = key + (updated_at, writes)
+    etag = make_etag(*key)
+    modified_at = updated_at if last_modified else None
+    if is_not_modified(request, etag, modified_at):
+        return not_modified(etag, modified_at)
+    set_validators(response, etag, modified_at)
+    return _listing_response(response, catalog_cache.get_or_set(key, compute))
+
+
 @router.get("/", response_model=List[ItemResponse])
 async def list_all_items(
-    skip: int = Query(0, ge=0),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use cursor instead; deep offsets get slower"),
     limit: int = Query(100, gt=1, le=100),  # Max 100 items per request
     db: Session = Depends(get_db)
 ):
-    """Get all items that are for sale"""
-    items = get_all_items(db, skip=skip, limit=limit)
-    return items
+    """Get all items that are for sale, newest first; the X-Next-Cursor header is set when more remain"""
+    return _conditional_listing(
+        request, response, db,
+        ("items_all", cursor, skip, limit),
+        lambda: _item_page(get_all_items(db, cursor=cursor, skip=skip, limit=limit))
+    )
 
 @router.get("/featured", response_model=List[ItemResponse])
 async def list_featured_items(
+    request: Request,
+    response: Response,
     limit: int = Query(100, gt=1, le=100),  # Max 100 featured items
+    exclude_ids: Optional[List[int]] = Query(None, description="Item IDs to leave out; repeat for several"),
+    exclude_id: Optional[int] = Query(None, deprecated=True, description="Single item ID to leave out; use exclude_ids"),
     db: Session = Depends(get_db)
 ):
-    """Get featured items (currently highest priced)"""
-    items = get_featured_items(db, limit=limit)
+    """Get featured items (currently highest priced), served from the in-memory featured set"""
+    excluded = _excluded_ids(exclude_ids, exclude_id)
+    # Read the version before the items, so the ETag never claims a newer set than the body holds
+    etag = make_etag("items_featured", limit, excluded, PROCESS_TOKEN, featured_items.version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    
+    items = featured_items.top(limit, excluded)
+    if items is None:
+        # Too few items held (e.g. after sell-outs): reload the set and answer from what was read
+        read = [item for item in rebuild_featured_items(db) if item.item_id not in excluded]
+        items = _item_responses(read[:limit])
     return items
 
 @router.get("/recent", response_model=List[ItemResponse])
 async def list_recent_items(
+    request: Request,
+    response: Response,
     days: int = Query(7, ge=1),  # No maximum limit on days
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     limit: int = Query(100, gt=1, le=100),  # Max 100 recent items
+    exclude_ids: Optional[List[int]] = Query(None, description="Item IDs to leave out; repeat for several"),
+    exclude_id: Optional[int] = Query(None, deprecated=True, description="Single item ID to leave out; use exclude_ids"),
     db: Session = Depends(get_db)
 ):
-    """Get recently listed items"""
-    items = get_recent_items(db, days=days, limit=limit)
-    return items
+    """Get recently listed items, newest first; the X-Next-Cursor header is set when more remain"""
+    excluded = _excluded_ids(exclude_ids, exclude_id)
+    # Items also leave the window as time passes, so its start is part of the version
+    return _conditional_listing(
+        request, response, db,
+        ("items_recent", days, cursor, limit, excluded, recent_window_start(days)),
+        lambda: _item_page(get_recent_items(db, days=days, cursor=cursor, limit=limit, exclude_ids=excluded)),
+        last_modified=False
+    )
 
 @router.get("/categories", response_model=List[CategoryResponse])
 async def list_categories(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Get all unique categories with item counts"""
-    categories = get_unique_categories(db)
-    return categories
+    """Get all unique categories with item counts, served from the in-memory category counts"""
+    etag = make_etag("items_categories", PROCESS_TOKEN, category_counts.version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    return category_counts.categories()
+
+@router.post("/categories/reconcile", response_model=List[CategoryDriftResponse])
+async def reconcile_categories(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rebuild the in-memory category counts from the database.
+    
+    Returns the categories whose counts had drifted. Only available to admin users.
+    """
+    if current_user.role != UserRole.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return reconcile_category_counts(db)
 
 @router.get("/categories/{category}", response_model=List[ItemResponse])
 async def list_items_by_category(
+    request: Request,
+    response: Response,
     category: str,
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use cursor instead; deep offsets get slower"),
     limit: int = Query(100, gt=1, le=100),  # Max 100 items per category query
     db: Session = Depends(get_db)
 ):
-    """Get items by category"""
-    items = get_items_by_category(db, category=category, skip=skip, limit=limit)
-    return items
\ No newline at end of file
+    """Get items by category, newest first; the X-Next-Cursor header is set when more remain"""
+    return _conditional_listing(
+        request, response, db,
+        ("items_by_category", category, cursor, skip, limit),
+        lambda: _item_page(get_items_by_category(db, category=category, cursor=cursor, skip=skip, limit=limit))
+    )
\ No newline at end of file
@@ -31,4 +31,11 @@ class CategoryResponse(BaseModel):
     item_count: int
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class CategoryDriftResponse(BaseModel):
+    """Response schema for a category whose in-memory count differed from the database"""
+    name: str
+    counted: int
+    actual: int
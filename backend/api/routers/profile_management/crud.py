@@ -1,5 +1,6 @@
 import logging
 from sqlmodel import Session, select, or_, and_
+from sqlalchemy import update
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import sys
@@ -14,6 +15,8 @@ from api.models.user.model import User
 from api.models.item.model import Item, item_status
 from api.models.transaction.model import Transaction
 from api.models.deposit.model import Deposit
+from api.events import publish_item_change
+from api.routers.transactions.balance_credits import user_balance
 
 from .schemas import ItemCreate, ItemUpdate, WalletDeposit
 
@@ -44,6 +47,7 @@ def create_item(db: Session, item_data: ItemCreate, seller_id: int) -> Item:
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
+    publish_item_change(db_item)
     return db_item
 
 
@@ -163,6 +167,7 @@ def update_item(db: Session, item_id: int, item_data: ItemUpdate) -> Optional[It
         db.add(db_item)
         db.commit()
         db.refresh(db_item)
+        publish_item_change(db_item)
     
     return db_item
 
@@ -192,6 +197,7 @@ def delete_item(db: Session, item_id: int, seller_id: int) -> bool:
     
     db.add(db_item)
     db.commit()
+    publish_item_change(db_item)
     
     return True
 
@@ -211,18 +217,18 @@ def deposit_to_wallet(db: Session, user_id: int, deposit_data: WalletDeposit) ->
     """
     logger.info(f"Attempting deposit for user_id: {user_id}, amount: {deposit_data.amount}")
     try:
-        # Get user
-        logger.debug(f"Fetching user with ID: {user_id}")
-        user = db.get(User, user_id)
-        if not user:
+        # Update user wallet balance relative to the stored one, so balance
+        # credits the background compactor folds in concurrently aren't overwritten
+        logger.debug(f"Adding {deposit_data.amount} to the balance of user {user_id}")
+        new_balance = db.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(cash_balance=User.cash_balance + float(deposit_data.amount))
+            .returning(User.cash_balance)
+        ).scalar_one_or_none()
+        if new_balance is None:
             logger.error(f"User not found for ID: {user_id}")
             raise ValueError("User not found")
-        logger.debug(f"User found: {user.username}. Current balance: {user.cash_balance}")
-            
-        # Update user wallet balance
-        new_balance = user.cash_balance + float(deposit_data.amount)
-        logger.debug(f"Updating balance from {user.cash_balance} to {new_balance}")
-        user.cash_balance = new_balance
         
         # Create deposit record
         logger.debug("Creating deposit record")
@@ -231,13 +237,12 @@ def deposit_to_wallet(db: Session, user_id: int, deposit_data: WalletDeposit) ->
             amount=deposit_data.amount
         )
         
-        logger.debug("Adding user and deposit objects to session")
-        db.add(user)
+        logger.debug("Adding deposit object to session")
         db.add(deposit)
         
         logger.debug("Committing transaction")
         db.commit()
-        logger.info(f"Deposit successful for user_id: {user_id}. New balance: {user.cash_balance}")
+        logger.info(f"Deposit successful for user_id: {user_id}. New balance: {new_balance}")
         
         logger.debug("Refreshing deposit object")
         db.refresh(deposit)
@@ -255,6 +260,9 @@ def get_wallet_balance(db: Session, user_id: int) -> float:
     """
     Get user wallet balance.
     
+    Sales and transfers credit users through the balance_credits ledger, so
+    the balance is cash_balance plus the credits not yet folded into it.
+    
     Args:
         db: Database session
         user_id: ID of the user
@@ -262,11 +270,11 @@ def get_wallet_balance(db: Session, user_id: int) -> float:
     Returns:
         float: Wallet balance
     """
-    user = db.get(User, user_id)
-    if not user:
+    balance = user_balance(db, user_id)
+    if balance is None:
         raise ValueError("User not found")
         
-    return user.cash_balance
+    return balance
 
 
 def get_user_transactions(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Transaction]:
@@ -314,7 +322,7 @@ def get_profile_overview(db: Session, user_id: int) -> Dict[str, Any]:
     return {
         "user_id": user.user_id,
         "username": user.username,
-        "wallet_balance": user.cash_balance,
+        "wallet_balance": user_balance(db, user_id),
         "items_for_sale": items_for_sale,
         "sold_items": sold_items,
         "purchased_items": purchased_items
@@ -11,6 +11,7 @@ ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
 from api.dependencies import get_current_user
+from api.idempotency import run_idempotent
 from api.db import get_db
 from api.models.user.model import User
 from api.models.item.model import Item, item_status
@@ -190,23 +191,33 @@ async def delete_item_endpoint(
 @router.post("/wallet/deposit", response_model=TransactionResponse)
 async def deposit_to_wallet_endpoint(
     deposit_data: WalletDeposit,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Unique key that makes retries of this deposit safe"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Deposit cash to user wallet."""
-    deposit = deposit_to_wallet(db, current_user.user_id, deposit_data)
+    """Deposit cash to user wallet; a retry with the same Idempotency-Key header doesn't deposit again."""
+    def deposit():
+        deposit = deposit_to_wallet(db, current_user.user_id, deposit_data)
+        
+        # Convert Deposit to TransactionResponse for consistency in API
+        return TransactionResponse(
+            id=deposit.deposit_id,
+            user_id=deposit.user_id,
+            amount=deposit.amount,
+            transaction_type="deposit",
+            description=f"Deposit of {deposit.amount}",
+            timestamp=deposit.deposit_time
+        )
     
-    # Convert Deposit to TransactionResponse for consistency in API
-    transaction = TransactionResponse(
-        id=deposit.deposit_id,
-        user_id=deposit.user_id,
-        amount=deposit.amount,
-        transaction_type="deposit",
-        description=f"Deposit of {deposit.amount}",
-        timestamp=deposit.deposit_time
+    return run_idempotent(
+        db,
+        idempotency_key,
+        current_user.user_id,
+        "deposit",
+        deposit_data,
+        deposit,
+        TransactionResponse
     )
-    
-    return transaction
 
 
 @router.get("/wallet/balance", response_model=float)
@@ -1,9 +1,43 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List, Tuple
+from sqlalchemy import Integer, any_, case, func, literal, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, Query, aliased
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Optional, List, Tuple, Iterator, Any, Dict, Sequence, Collection
+from api.pagination import paginate, apply_keyset, DEFAULT_PAGE_SIZE
 from api.models.user.model import User
 from api.models.item.model import Item, item_status
 from api.models.transaction.model import Transaction
 from api.models.deposit.model import Deposit
+from api.routers.search.text_search import item_name_search, item_category_filter, normalize_term
+from api.routers.search.fuzzy import fuzzy_index
+
+# Rows fetched per round trip from the server-side cursor when streaming results
+STREAM_BATCH_SIZE = 500
+
+# Both parties of a transaction are users, so each gets its own alias
+SellerUser = aliased(User, name="seller")
+BuyerUser = aliased(User, name="buyer")
+
+class ItemSort(str, Enum):
+    """Explicit item search orderings, each backed by a composite (status, key, item_id) index"""
+    price_asc = "price_asc"
+    price_desc = "price_desc"
+    newest = "newest"
+    best_selling = "best_selling"
+
+
+# Sort key and direction of each ordering; item_id breaks ties in the same direction
+ITEM_SORT_KEYS = {
+    ItemSort.price_asc: (Item.price, False),
+    ItemSort.price_desc: (Item.price, True),
+    ItemSort.newest: (Item.listed_at, True),
+    ItemSort.best_selling: (Item.units_sold, True),
+}
+
+# Lower edges of the price histogram buckets in item search facets; the last bucket is open-ended
+PRICE_BUCKET_EDGES = [0, 10, 25, 50, 100, 250, 500, 1000]
 
 
 def search_items(
@@ -15,54 +49,232 @@ def search_items(
     status: Optional[item_status] = None,
     seller_id: Optional[int] = None,
 ) -> List[Item]:
-    """Search for items based on various criteria"""
+    """Search for items based on various criteria, most relevant first when searching by name"""
     query = db.query(Item)
     
     if status:
         query = query.filter(Item.status == status)
-    if name:
-        query = query.filter(Item.name.ilike(f"%{name.lower()}%"))
-    if category:
-        query = query.filter(Item.category.ilike(f"%{category.lower()}%"))
+    name_filter, name_key, name_descending = item_name_search(name)
+    if name_filter is not None:
+        query = query.filter(name_filter)
+    category_filter = item_category_filter(category)
+    if category_filter is not None:
+        query = query.filter(category_filter)
     if min_price is not None:
         query = query.filter(Item.price >= min_price)
     if max_price is not None:
         query = query.filter(Item.price <= max_price)
     if seller_id:
         query = query.filter(Item.seller_user_id == seller_id)
+    if name_key is not None:
+        query = query.order_by(name_key.desc() if name_descending else name_key, Item.item_id)
     
     return query.all()
 
 
-def enhanced_search_items(
-    db: Session,
+def _id_array(ids: Collection[int]):
+    """Bind a list of IDs as one array parameter, for `column = ANY(:ids)` lookups"""
+    return any_(literal(list(ids), ARRAY(Integer)))
+
+
+def _filter_items(
+    query: Query,
     name: Optional[str] = None,
-    category: Optional[str] = None,
+    category: Optional[Sequence[str]] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    status: Optional[item_status] = None,
-    seller_id: Optional[int] = None,
+    status: Optional[Sequence[item_status]] = None,
+    seller_id: Optional[Sequence[int]] = None,
     min_quantity: Optional[int] = None,
-) -> List[Tuple[Item, User]]:
-    """Enhanced search for items with seller information"""
-    query = db.query(Item, User).join(User, Item.seller_user_id == User.user_id)
-    
+    fuzzy: bool = False,
+) -> Tuple[Query, Optional[Tuple[str, Any, bool]]]:
+    """
+    Apply the item search filters to a query over items.
+
+    category, status and seller_id each take any number of values and match
+    items with any of them. Every category is a substring match; several
+    sellers are matched with one `= ANY(:seller_ids)` lookup.
+
+    With fuzzy, the name is matched through the in-memory trigram index
+    instead of the database: its best matches with a searched status are
+    joined in with their rank, so the other filters apply before the page is
+    cut, and matches keep the index's ranking.
+
+    Returns (query, name ordering) where the name ordering is
+    (ordering name, sort key, descending), or None unless searching by name.
+    """
+    name_ordering = None
     if status:
-        query = query.filter(Item.status == status)
-    if name:
-        query = query.filter(Item.name.ilike(f"%{name.lower()}%"))
-    if category:
-        query = query.filter(Item.category.ilike(f"%{category.lower()}%"))
+        query = query.filter(Item.status == status[0] if len(status) == 1 else Item.status.in_(status))
+    if fuzzy and normalize_term(name):
+        ranked = func.unnest(literal(fuzzy_index.search(name, status), ARRAY(Integer))).table_valued(
+            "item_id", with_ordinality="rank"
+        ).render_derived(name="fuzzy_rank")
+        query = query.join(ranked, ranked.c.item_id == Item.item_id)
+        name_ordering = ("fuzzy", ranked.c.rank, False)
+    else:
+        name_filter, name_key, name_descending = item_name_search(name)
+        if name_filter is not None:
+            query = query.filter(name_filter)
+            name_ordering = ("relevance" if name_descending else "name", name_key, name_descending)
+    category_filter = item_category_filter(*(category or ()))
+    if category_filter is not None:
+        query = query.filter(category_filter)
     if min_price is not None:
         query = query.filter(Item.price >= min_price)
     if max_price is not None:
         query = query.filter(Item.price <= max_price)
     if seller_id:
-        query = query.filter(Item.seller_user_id == seller_id)
+        query = query.filter(Item.seller_user_id == (seller_id[0] if len(seller_id) == 1 else _id_array(seller_id)))
     if min_quantity is not None:
         query = query.filter(Item.quantity >= min_quantity)
-    
-    return query.all()
+    return query, name_ordering
+
+
+def _enhanced_items_query(
+    db: Session,
+    columns: Optional[Sequence[Any]] = None,
+    joins: Collection[str] = (),
+    sort: Optional[ItemSort] = None,
+    **filters,
+) -> Tuple[Query, str, List[Any], bool]:
+    """
+    Build the filtered item/seller query and the keyset ordering to walk it in.
+
+    Accepts the filters of _filter_items. Selects (item, seller) rows, or only
+    the given columns when a projection is requested, in which case the seller
+    is joined only if "seller" is in joins. An explicit sort wins; otherwise
+    name searches are ordered by relevance (or fuzzy index rank), everything
+    else by item ID.
+    Returns (query, ordering name, sort keys, descending).
+    """
+    if columns is None:
+        query = db.query(Item, User).join(User, Item.seller_user_id == User.user_id)
+    else:
+        query = db.query(*columns).select_from(Item)
+        if "seller" in joins:
+            query = query.join(User, Item.seller_user_id == User.user_id)
+    query, name_ordering = _filter_items(query, **filters)
+
+    if sort is not None:
+        sort_key, descending = ITEM_SORT_KEYS[sort]
+        return query, sort.value, [sort_key, Item.item_id], descending
+    if name_ordering is not None:
+        ordering, name_key, descending = name_ordering
+        return query, ordering, [name_key, Item.item_id], descending
+    return query, "item_id", [Item.item_id], False
+
+
+def enhanced_search_items(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    **filters,
+) -> Tuple[List[Tuple[Item, User]], Optional[str]]:
+    """
+    Enhanced search for items with seller information, one keyset page at a time.
+
+    Accepts the filters and projection of _enhanced_items_query. Returns the
+    page of (item, seller) rows (or projected column tuples) and the cursor
+    for the next page.
+    """
+    query, ordering, sort_keys, descending = _enhanced_items_query(db, **filters)
+    return paginate(query, ordering, sort_keys, cursor, limit, descending)
+
+
+def enhanced_search_items_sideloaded(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    **filters,
+) -> Tuple[List[Item], Dict[int, User], Optional[str]]:
+    """
+    Search for items one keyset page at a time, loading each seller once.
+
+    Items are paged without the seller join, then their distinct sellers are
+    fetched in one keyed lookup. Accepts the filters of _filter_items.
+    Returns the page of items, the sellers keyed by user ID and the cursor
+    for the next page.
+    """
+    query, ordering, sort_keys, descending = _enhanced_items_query(db, columns=[Item], **filters)
+    items, next_cursor = paginate(query, ordering, sort_keys, cursor, limit, descending)
+    sellers = get_users_by_ids(db, {item.seller_user_id for item in items})
+    return items, sellers, next_cursor
+
+
+def stream_enhanced_search_items(
+    db: Session,
+    cursor: Optional[str] = None,
+    **filters,
+) -> Iterator[Tuple[Item, User]]:
+    """
+    Stream every (item, seller) row matching the filters, starting after cursor.
+
+    Rows are read through a server-side cursor STREAM_BATCH_SIZE at a time, so
+    memory stays flat regardless of the number of matches.
+    """
+    query, ordering, sort_keys, descending = _enhanced_items_query(db, **filters)
+    query = apply_keyset(query, ordering, sort_keys, cursor, descending)
+    return query.yield_per(STREAM_BATCH_SIZE)
+
+
+def _price_bucket():
+    """Index of the PRICE_BUCKET_EDGES bucket an item's price falls in"""
+    return case(
+        *[(Item.price < edge, index) for index, edge in enumerate(PRICE_BUCKET_EDGES[1:])],
+        else_=len(PRICE_BUCKET_EDGES) - 1
+    )
+
+
+def item_search_facets(db: Session, **filters) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Count the items matching the search filters per category, status and price bucket.
+
+    All three facets come from one GROUPING SETS aggregate, so the filtered
+    item set is scanned once however many facets are returned. Accepts the
+    filters of _filter_items.
+
+    Returns:
+        Dict with "categories" and "statuses" ({value, count}, largest first)
+        and "price_buckets" ({min_price, max_price, count} in price order,
+        max_price None for the open-ended top bucket)
+    """
+    bucket = _price_bucket()
+    query = db.query(
+        Item.category,
+        Item.status,
+        bucket,
+        func.grouping(Item.category),
+        func.grouping(Item.status),
+        func.count()
+    )
+    query, _ = _filter_items(query, **filters)
+    query = query.group_by(func.grouping_sets(
+        tuple_(Item.category),
+        tuple_(Item.status),
+        tuple_(bucket)
+    ))
+
+    categories, statuses, buckets = [], [], {}
+    for category, item_status_, bucket_index, category_grouped, status_grouped, count in query.all():
+        # grouping() is 0 for the column the row was grouped by
+        if category_grouped == 0:
+            if category is not None:
+                categories.append({"value": category, "count": count})
+        elif status_grouped == 0:
+            statuses.append({"value": item_status_.value, "count": count})
+        else:
+            buckets[bucket_index] = count
+
+    upper_edges = PRICE_BUCKET_EDGES[1:] + [None]
+    return {
+        "categories": sorted(categories, key=lambda facet: (-facet["count"], facet["value"])),
+        "statuses": sorted(statuses, key=lambda facet: (-facet["count"], facet["value"])),
+        "price_buckets": [
+            {"min_price": lower, "max_price": upper, "count": buckets.get(index, 0)}
+            for index, (lower, upper) in enumerate(zip(PRICE_BUCKET_EDGES, upper_edges))
+        ],
+    }
 
 
 def get_item_by_id(db: Session, item_id: int) -> Optional[Item]:
@@ -70,6 +282,14 @@ def get_item_by_id(db: Session, item_id: int) -> Optional[Item]:
     return db.query(Item).filter(Item.item_id == item_id).first()
 
 
+def get_items_by_ids(db: Session, item_ids: Collection[int]) -> Dict[int, Item]:
+    """Get many items by ID in one query, keyed by item ID"""
+    if not item_ids:
+        return {}
+    items = db.query(Item).filter(Item.item_id == _id_array(item_ids)).all()
+    return {item.item_id: item for item in items}
+
+
 def enhanced_search_item_by_id(db: Session, item_id: int) -> Optional[Tuple[Item, User]]:
     """Get enhanced item info (with seller) by ID"""
     result = db.query(Item, User)\
@@ -79,14 +299,33 @@ def enhanced_search_item_by_id(db: Session, item_id: int) -> Optional[Tuple[Item
     return result
 
 
+def enhanced_search_items_by_ids(db: Session, item_ids: Sequence[int]) -> Dict[int, Tuple[Item, User]]:
+    """
+    Get enhanced item info (with seller) for many IDs in one query.
+
+    The IDs are bound as a single array parameter (item_id = ANY(:ids)), so the
+    statement is the same however many IDs are asked for.
+    Returns the found (item, seller) rows keyed by item ID.
+    """
+    if not item_ids:
+        return {}
+    rows = db.query(Item, User)\
+             .join(User, Item.seller_user_id == User.user_id)\
+             .filter(Item.item_id == _id_array(item_ids))\
+             .all()
+    return {item.item_id: (item, seller) for item, seller in rows}
+
+
 def search_users(
     db: Session,
     username: Optional[str] = None,
     email: Optional[str] = None,
     min_cash_balance: Optional[float] = None,
     max_cash_balance: Optional[float] = None,
-) -> List[User]:
-    """Search for users based on various criteria"""
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[User], Optional[str]]:
+    """Search for users based on various criteria, one keyset page (by user ID) at a time"""
     query = db.query(User)
 
     if username:
@@ -98,7 +337,7 @@ def search_users(
     if max_cash_balance is not None:
         query = query.filter(User.cash_balance <= max_cash_balance)
 
-    return query.all()
+    return paginate(query, "user_id", [User.user_id], cursor, limit)
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -106,22 +345,46 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.user_id == user_id).first()
 
 
-def search_deposits(
-    db: Session,
+def get_users_by_ids(db: Session, user_ids: Collection[int]) -> Dict[int, User]:
+    """Get many users by ID in one query, keyed by user ID"""
+    if not user_ids:
+        return {}
+    users = db.query(User).filter(User.user_id == _id_array(user_ids)).all()
+    return {user.user_id: user for user in users}
+
+
+def _filter_deposits(
+    query: Query,
     user_id: Optional[int] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
-) -> List[Deposit]:
-    """Search for deposits based on various criteria"""
-    query = db.query(Deposit)
-
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+) -> Query:
+    """Apply the deposit search filters; the time range is inclusive of time_from and exclusive of time_to"""
     if user_id:
         query = query.filter(Deposit.user_id == user_id)
     if min_amount is not None:
         query = query.filter(Deposit.amount >= min_amount)
     if max_amount is not None:
         query = query.filter(Deposit.amount <= max_amount)
+    if time_from is not None:
+        query = query.filter(Deposit.deposit_time >= time_from)
+    if time_to is not None:
+        query = query.filter(Deposit.deposit_time < time_to)
+    return query
+
 
+def search_deposits(
+    db: Session,
+    user_id: Optional[int] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+) -> List[Deposit]:
+    """Search for deposits based on various criteria"""
+    query = _filter_deposits(db.query(Deposit), user_id, min_amount, max_amount, time_from, time_to)
     return query.all()
 
 
@@ -130,18 +393,45 @@ def enhanced_search_deposits(
     user_id: Optional[int] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
-) -> List[Tuple[Deposit, User]]:
-    """Search for deposits with full user details"""
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Tuple[Deposit, User]], Optional[str]]:
+    """
+    Search for deposits with full user details, newest first, one keyset page at a time.
+
+    Pages walk (deposit_time, deposit_id), so with or without a user filter
+    every page is a range scan of a deposits index.
+    """
     query = db.query(Deposit, User).join(User, Deposit.user_id == User.user_id)
+    query = _filter_deposits(query, user_id, min_amount, max_amount, time_from, time_to)
+    return paginate(
+        query, "deposit_time", [Deposit.deposit_time, Deposit.deposit_id], cursor, limit, descending=True
+    )
 
-    if user_id:
-        query = query.filter(Deposit.user_id == user_id)
-    if min_amount is not None:
-        query = query.filter(Deposit.amount >= min_amount)
-    if max_amount is not None:
-        query = query.filter(Deposit.amount <= max_amount)
 
-    return query.all()
+def deposit_daily_totals(
+    db: Session,
+    user_id: Optional[int] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Tuple[datetime, int, Decimal]], Optional[str]]:
+    """
+    Number and sum of the matching deposits per day, newest day first, one keyset page at a time.
+
+    Returns:
+        ((day, deposit_count, total_amount) rows, next_cursor)
+    """
+    day = func.date_trunc("day", Deposit.deposit_time)
+    query = db.query(day.label("day"), func.count(Deposit.deposit_id), func.sum(Deposit.amount))
+    query = _filter_deposits(query, user_id, min_amount, max_amount, time_from, time_to).group_by(day)
+    rows, next_cursor = paginate(query, "deposit_day", [day], cursor, limit, descending=True)
+    return [tuple(row) for row in rows], next_cursor
 
 
 def get_deposit_by_id(db: Session, deposit_id: int) -> Optional[Deposit]:
@@ -189,7 +479,7 @@ def search_transactions(
     return query.all()
 
 
-def enhanced_search_transactions(
+def _enhanced_transactions_query(
     db: Session,
     item_id: Optional[int] = None,
     buyer_user_id: Optional[int] = None,
@@ -198,18 +488,26 @@ def enhanced_search_transactions(
     max_quantity: Optional[int] = None,
     min_total_amount: Optional[float] = None,
     max_total_amount: Optional[float] = None,
-) -> List[Tuple[Transaction, User, User, Optional[Item]]]:
-    """Search for transactions with full user and item details"""
-    # Using aliased joins to get both seller and buyer information
-    from sqlalchemy.orm import aliased
-    
-    SellerUser = aliased(User)
-    BuyerUser = aliased(User)
-    
-    query = db.query(Transaction, SellerUser, BuyerUser, Item)\
-              .join(SellerUser, Transaction.seller_user_id == SellerUser.user_id)\
-              .join(BuyerUser, Transaction.buyer_user_id == BuyerUser.user_id)\
-              .outerjoin(Item, Transaction.item_id == Item.item_id)
+    columns: Optional[Sequence[Any]] = None,
+    joins: Collection[str] = (),
+) -> Query:
+    """
+    Build the filtered transaction query.
+
+    Selects transactions alone, or only the given columns of Transaction,
+    SellerUser, BuyerUser and Item when a projection is requested, joining
+    just the relations named in joins.
+    """
+    if columns is None:
+        query = db.query(Transaction)
+    else:
+        query = db.query(*columns).select_from(Transaction)
+    if "seller" in joins:
+        query = query.join(SellerUser, Transaction.seller_user_id == SellerUser.user_id)
+    if "buyer" in joins:
+        query = query.join(BuyerUser, Transaction.buyer_user_id == BuyerUser.user_id)
+    if "item" in joins:
+        query = query.outerjoin(Item, Transaction.item_id == Item.item_id)
 
     if item_id:
         query = query.filter(Transaction.item_id == item_id)
@@ -226,7 +524,71 @@ def enhanced_search_transactions(
     if max_total_amount is not None:
         query = query.filter(Transaction.total_amount <= max_total_amount)
 
-    return query.all()
+    return query
+
+
+def enhanced_search_transactions(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    **filters,
+) -> Tuple[List[Tuple[Transaction, User, User, Optional[Item]]], Optional[str]]:
+    """
+    Search for transactions with full user and item details, newest first, one keyset page at a time.
+
+    The page of transactions is fetched without joins, then its parties and
+    items are resolved with one lookup each. Accepts the filters and
+    projection of _enhanced_transactions_query; projected pages come back as
+    column tuples instead.
+    """
+    query = _enhanced_transactions_query(db, **filters)
+    rows, next_cursor = paginate(query, "transaction_id", [Transaction.transaction_id], cursor, limit, descending=True)
+    if filters.get("columns") is None:
+        rows = _with_parties_and_items(db, rows)
+    return rows, next_cursor
+
+
+def stream_enhanced_search_transactions(
+    db: Session,
+    cursor: Optional[str] = None,
+    **filters,
+) -> Iterator[Tuple[Transaction, User, User, Optional[Item]]]:
+    """
+    Stream every transaction row matching the filters through a server-side cursor, newest first.
+
+    Parties and items are resolved once per batch of STREAM_BATCH_SIZE
+    transactions, as in enhanced_search_transactions.
+    """
+    query = _enhanced_transactions_query(db, **filters)
+    query = apply_keyset(query, "transaction_id", [Transaction.transaction_id], cursor, descending=True)
+    rows = query.yield_per(STREAM_BATCH_SIZE)
+    if filters.get("columns") is not None:
+        return rows
+
+    def stitched():
+        batch = []
+        for transaction in rows:
+            batch.append(transaction)
+            if len(batch) == STREAM_BATCH_SIZE:
+                yield from _with_parties_and_items(db, batch)
+                batch = []
+        if batch:
+            yield from _with_parties_and_items(db, batch)
+
+    return stitched()
+
+
+def _with_parties_and_items(
+    db: Session,
+    transactions: Sequence[Transaction],
+) -> List[Tuple[Transaction, User, User, Optional[Item]]]:
+    """Pair transactions with their seller, buyer and item, loaded with one users and one items lookup"""
+    users = get_users_by_ids(db, {t.seller_user_id for t in transactions} | {t.buyer_user_id for t in transactions})
+    items = get_items_by_ids(db, {t.item_id for t in transactions})
+    return [
+        (t, users[t.seller_user_id], users[t.buyer_user_id], items.get(t.item_id))
+        for t in transactions
+    ]
 
 
 def get_transaction_by_id(db: Session, transaction_id: int) -> Optional[Transaction]:
@@ -0,0 +1,120 @@
+"""
+Sparse fieldsets for search responses.
+
+A `fields=name,price,seller.username` parameter selects only those columns
+from the database and serializes them with a response model holding just
+those fields, instead of hydrating and returning every column of every joined
+row. Fields of joined rows are addressed as `<relation>.<field>`.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+
+
+class Projection:
+    """
+    The fields a search endpoint can project and the columns they come from.
+
+    Args:
+        name: Prefix for the generated response model names
+        groups: Relation name ("" for the searched row itself) to the mapped
+            entity or alias its columns come from and the schema whose fields
+            may be requested
+        page_schema: Page envelope schema whose `results` the projected rows replace
+    """
+
+    def __init__(self, name: str, groups: Dict[str, Tuple[Any, Type[BaseModel]]], page_schema: Type[BaseModel]):
+        self.name = name
+        self.groups = groups
+        self.page_schema = page_schema
+        self.available: Dict[str, Tuple[str, str, Any]] = {}
+        for group, (entity, schema) in groups.items():
+            for field_name, field in schema.model_fields.items():
+                if field.annotation is not None and hasattr(entity, field_name):
+                    path = f"{group}.{field_name}" if group else field_name
+                    self.available[path] = (group, field_name, field.annotation)
+        self._models: Dict[Tuple[str, ...], Type[BaseModel]] = {}
+        self._lock = threading.Lock()
+
+    def parse(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """
+        Parse a comma separated fields parameter, keeping the first occurrence of each field.
+
+        Returns:
+            The requested fields, or None when the parameter is empty
+
+        Raises:
+            HTTPException: If a field isn't available for this search
+        """
+        if not fields:
+            return None
+
+        paths = tuple(dict.fromkeys(path.strip() for path in fields.split(",") if path.strip()))
+        unknown = [path for path in paths if path not in self.available]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(self.available)}"
+            )
+        return paths or None
+
+    def columns(self, paths: Sequence[str]) -> List[Any]:
+        """Columns to select for the requested fields, in the same order"""
+        columns = []
+        for path in paths:
+            group, field_name, _ = self.available[path]
+            columns.append(getattr(self.groups[group][0], field_name))
+        return columns
+
+    def joins(self, paths: Sequence[str]) -> Set[str]:
+        """Relations that have to be joined to select the requested fields"""
+        return {self.available[path][0] for path in paths} - {""}
+
+    def model(self, paths: Tuple[str, ...]) -> Type[BaseModel]:
+        """Response model with exactly the requested fields, built once per fieldset"""
+        return self._cached_model(paths, self._build_model)
+
+    def page_model(self, paths: Tuple[str, ...]) -> Type[BaseModel]:
+        """Page envelope whose results use model(paths)"""
+        return self._cached_model(("page",) + paths, lambda _: create_model(
+            f"{self.name}FieldsPage", __base__=self.page_schema, results=(List[self.model(paths)], ...)
+        ))
+
+    def _cached_model(self, key: Tuple[str, ...], build) -> Type[BaseModel]:
+        with self._lock:
+            model = self._models.get(key)
+        if model is None:
+            model = build(key)
+            with self._lock:
+                model = self._models.setdefault(key, model)
+        return model
+
+    def _build_model(self, paths: Tuple[str, ...]) -> Type[BaseModel]:
+        top_level: Dict[str, Any] = {}
+        nested: Dict[str, Dict[str, Any]] = {}
+        for path in paths:
+            group, field_name, annotation = self.available[path]
+            target = nested.setdefault(group, {}) if group else top_level
+            target[field_name] = (Optional[annotation], None)
+
+        for group, group_fields in nested.items():
+            group_model = create_model(f"{self.name}{group.title()}Fields", **group_fields)
+            top_level[group] = (Optional[group_model], None)
+        return create_model(f"{self.name}Fields", **top_level)
+
+    def to_dict(self, paths: Sequence[str], row: Sequence[Any]) -> Dict[str, Any]:
+        """Nest one selected row into a dict shaped like model(paths); a relation with no match is None"""
+        result: Dict[str, Any] = {}
+        for path, value in zip(paths, row):
+            group, field_name, _ = self.available[path]
+            if group:
+                result.setdefault(group, {})[field_name] = value
+            else:
+                result[field_name] = value
+
+        for group in self.joins(paths):
+            if all(value is None for value in result[group].values()):
+                result[group] = None
+        return result
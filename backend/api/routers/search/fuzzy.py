@@ -0,0 +1,198 @@
+"""
+In-memory trigram index for typo-tolerant item search.
+
+Item names and categories are split into padded character trigrams (as
+pg_trgm does) and each trigram keeps an array of the documents containing it.
+A query is scored by how many of its trigrams each document shares, so
+"iphnoe" still finds "iPhone" while ILIKE finds nothing. Only documents in
+the query's rarest posting arrays can reach MIN_SCORE, so just those are
+scored, and only the best MAX_MATCHES item IDs with a searched status come
+back from memory; the database applies the remaining filters to them before
+paging.
+
+Every item write appends a fresh document and tombstones the old one instead
+of editing posting arrays in place; the arrays are compacted once tombstones
+pile up. The index is loaded at startup and rebuilt periodically so writes
+made by other worker processes show up too.
+"""
+import heapq
+import logging
+import os
+import threading
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from api.events import on_item_change
+from api.models.item.model import Item, item_status
+from api.routers.search.text_search import normalize_term
+
+logger = logging.getLogger("fuzzy")
+
+FUZZY_INDEX_REFRESH_SECONDS = float(os.getenv("FUZZY_INDEX_REFRESH_SECONDS", 300))
+
+# Share of the query's trigrams a document needs to be a match
+MIN_SCORE = 0.4
+
+# Best matches handed to the database per search
+MAX_MATCHES = int(os.getenv("FUZZY_MAX_MATCHES", 1000))
+
+# Compact the posting arrays once this share of documents is tombstoned
+MAX_DEAD_RATIO = 0.25
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Padded trigrams of every word, as pg_trgm computes them ('cat' -> '  c', ' ca', 'cat', 'at ')"""
+    grams = set()
+    for word in normalize_term(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# One byte per document records its item's status
+_STATUS_CODES = {value: code for code, value in enumerate(item_status)}
+
+
+class FuzzyIndex:
+    """Trigram inverted index over item names and categories"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, array] = {}
+        # Per document number: item ID, trigram count, status code and whether it's still current
+        self._doc_items = array("I")
+        self._doc_sizes = array("H")
+        self._doc_status = bytearray()
+        self._doc_live = bytearray()
+        self._item_docs: Dict[int, int] = {}
+        self._item_entries: Dict[int, Tuple[str, int]] = {}
+        self._dead = 0
+        # Items written while a rebuild reads the database, re-applied after it swaps in
+        self._pending: Optional[Dict[int, Tuple[str, int]]] = None
+
+    def search(self, term: str, statuses: Optional[Collection[item_status]] = None) -> List[int]:
+        """IDs of the best MAX_MATCHES items with one of statuses (any without) matching term, best first"""
+        query_grams = trigrams(term)
+        if not query_grams:
+            return []
+
+        # Only copying the posting arrays needs the lock. Writes append to the
+        # document arrays and compaction swaps in new ones, so the references
+        # taken here stay valid for every document in the copies.
+        with self._lock:
+            postings = [self._postings[gram][:] for gram in query_grams if gram in self._postings]
+            doc_items, doc_sizes = self._doc_items, self._doc_sizes
+            doc_status, doc_live = self._doc_status, self._doc_live
+
+        # A match shares at least `needed` trigrams, so it can miss at most
+        # len(query_grams) - needed of them and must appear in one of the
+        # rarest arrays beyond that; trigrams no document has count as empty.
+        # Only those documents are candidates, looked up in the common arrays.
+        needed = next(count for count in range(1, len(query_grams) + 1) if count / len(query_grams) >= MIN_SCORE)
+        postings.sort(key=len)
+        rare_count = len(postings) - needed + 1
+        if rare_count <= 0:
+            return []
+        counts = Counter(chain.from_iterable(postings[:rare_count]))
+        candidates = set(counts)
+        for common in postings[rare_count:]:
+            counts.update(candidates.intersection(common))
+
+        wanted = None if not statuses else {_STATUS_CODES[value] for value in statuses}
+        scored = []
+        for doc, count in counts.items():
+            coverage = count / len(query_grams)
+            if coverage >= MIN_SCORE and doc_live[doc] and (wanted is None or doc_status[doc] in wanted):
+                # Mostly how much of the query matched, then how little else the name holds
+                score = 0.8 * coverage + 0.2 * count / doc_sizes[doc]
+                scored.append((-score, doc_items[doc]))
+
+        return [item_id for _, item_id in heapq.nsmallest(MAX_MATCHES, scored)]
+
+    def load(self, items: Iterable[Tuple[int, str, Optional[str], item_status]]) -> None:
+        """Replace the index with (item_id, name, category, status) rows"""
+        fresh = FuzzyIndex()
+        for item_id, name, category, status in items:
+            fresh._add(item_id, (f"{name} {category or ''}", _STATUS_CODES[status]))
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._swap(fresh)
+            for item_id, entry in (pending or {}).items():
+                self._add(item_id, entry)
+
+    def begin_rebuild(self) -> None:
+        """Start recording item writes so a rebuild in progress doesn't lose them"""
+        with self._lock:
+            self._pending = {}
+
+    def patch(self, item: Item) -> None:
+        """Re-index one item after a write"""
+        item_id = item.item_id
+        entry = (f"{item.name} {item.category or ''}", _STATUS_CODES[item.status])
+        with self._lock:
+            if self._pending is not None:
+                self._pending[item_id] = entry
+            if self._item_entries.get(item_id) == entry:
+                return
+            self._add(item_id, entry)
+            if self._dead > MAX_DEAD_RATIO * len(self._doc_items):
+                self._compact()
+
+    def _add(self, item_id: int, entry: Tuple[str, int]) -> None:
+        text, status_code = entry
+        previous = self._item_docs.get(item_id)
+        if previous is not None:
+            self._doc_live[previous] = 0
+            self._dead += 1
+
+        doc = len(self._doc_items)
+        grams = trigrams(text)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(doc)
+        self._doc_items.append(item_id)
+        self._doc_sizes.append(min(len(grams), 0xFFFF) or 1)
+        self._doc_status.append(status_code)
+        self._doc_live.append(1)
+        self._item_docs[item_id] = doc
+        self._item_entries[item_id] = entry
+
+    def _compact(self) -> None:
+        """Rebuild the posting arrays from the live documents, dropping tombstones"""
+        fresh = FuzzyIndex()
+        for item_id, entry in self._item_entries.items():
+            fresh._add(item_id, entry)
+        self._swap(fresh)
+
+    def _swap(self, fresh: "FuzzyIndex") -> None:
+        self._postings = fresh._postings
+        self._doc_items = fresh._doc_items
+        self._doc_sizes = fresh._doc_sizes
+        self._doc_status = fresh._doc_status
+        self._doc_live = fresh._doc_live
+        self._item_docs = fresh._item_docs
+        self._item_entries = fresh._item_entries
+        self._dead = 0
+
+
+fuzzy_index = FuzzyIndex()
+
+
+def rebuild_fuzzy_index(db: Session) -> None:
+    """Reload the fuzzy index from every item"""
+    fuzzy_index.begin_rebuild()
+    rows = db.query(Item.item_id, Item.name, Item.category, Item.status).all()
+    fuzzy_index.load(rows)
+    logger.info(f"Fuzzy index loaded with {len(rows)} items")
+
+
+@on_item_change
+def _patch_fuzzy_index(item: Item) -> None:
+    fuzzy_index.patch(item)
@@ -1,6 +1,9 @@
 from pathlib import Path
 import sys
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import ExitStack
 from sqlalchemy.orm import Session
 from typing import List, Optional, Union
 
@@ -8,11 +11,38 @@ from typing import List, Optional, Union
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
+from api.cache import catalog_cache
+from api.db import session_scope
 from api.dependencies import get_db, get_current_user
+from api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from api.models.user.model import UserRole
-from api.models.item.model import item_status
+from api.models.user.model import User
+from api.models.item.model import Item, item_status
 from api.models.transaction.model import Transaction
 from datetime import datetime
+from api.routers.search.text_search import normalize_term
+from api.routers.search.suggest import suggest_index, MAX_SUGGESTIONS
+from api.routers.search.fields import Projection
+from api.routers.search.serializers import (
+    SELLER_ITEM_JSON,
+    SELLER_ITEM_PAGE_JSON,
+    SIDELOADED_ITEM_PAGE_JSON,
+    SELLER_ITEM_BATCH_JSON,
+    USER_JSON,
+    USER_PAGE_JSON,
+    ENHANCED_DEPOSIT_JSON,
+    ENHANCED_DEPOSIT_PAGE_JSON,
+    DEPOSIT_DAILY_PAGE_JSON,
+    ENHANCED_TRANSACTION_JSON,
+    ENHANCED_TRANSACTION_PAGE_JSON,
+    user_dict,
+    item_dict,
+    seller_item_dict,
+    enhanced_deposit_dict,
+    deposit_day_total_dict,
+    enhanced_transaction_dict,
+    json_response
+)
 
 # Import schemas from the schemas.py file
 from api.routers.search.schemas import (
@@ -22,25 +52,43 @@ from api.routers.search.schemas import (
     DepositOut,
     EnhancedDepositOut,
     TransactionOut,
-    EnhancedTransactionOut
+    EnhancedTransactionOut,
+    SellerItemPage,
+    SideloadedItemPage,
+    SuggestionOut,
+    ItemBatchRequest,
+    SellerItemBatch,
+    UserPage,
+    EnhancedDepositPage,
+    DepositDailyPage,
+    EnhancedTransactionPage
 )
 
 # Import CRUD functions
 from api.routers.search.crud import (
     search_items,
     enhanced_search_items,
+    ItemSort,
+    enhanced_search_items_sideloaded,
+    stream_enhanced_search_items,
+    item_search_facets,
     get_item_by_id,
     enhanced_search_item_by_id,
+    enhanced_search_items_by_ids,
     search_users,
     get_user_by_id,
     search_deposits,
     enhanced_search_deposits,
+    deposit_daily_totals,
     get_deposit_by_id,
     enhanced_get_deposit_by_id,
     search_transactions,
     enhanced_search_transactions,
+    stream_enhanced_search_transactions,
     get_transaction_by_id,
-    enhanced_get_transaction_by_id
+    enhanced_get_transaction_by_id,
+    SellerUser,
+    BuyerUser
 )
 
 
@@ -49,116 +97,133 @@ search_router = APIRouter(
     responses={404: {"description": "Not found"}}  # Default response for 404 errors
 )
 
-# Helper function to convert database results to SellerItemOut format
-def _format_seller_item(item, seller):
-    """Helper function to convert database results to schema format"""
-    seller_data = UserOut(
-        user_id=seller.user_id,
-        username=seller.username,
-        email=seller.email,
-        role=seller.role,
-        cash_balance=seller.cash_balance,
-        created_at=seller.created_at
-    )
-    
-    return SellerItemOut(
-        item_id=item.item_id,
-        name=item.name,
-        description=item.description,
-        category=item.category,
-        price=item.price,
-        quantity=item.quantity,
-        status=item.status,
-        seller_user_id=item.seller_user_id,
-        listed_at=item.listed_at,
-        updated_at=item.updated_at,
-        seller=seller_data
-    )
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-# Helper function to convert database results to EnhancedDepositOut format
-def _format_enhanced_deposit(deposit, user):
-    """Helper function to format deposit with user details"""
-    user_data = UserOut(
-        user_id=user.user_id,
-        username=user.username,
-        email=user.email,
-        role=user.role,
-        cash_balance=user.cash_balance,
-        created_at=user.created_at
-    )
-    
-    return EnhancedDepositOut(
-        deposit_id=deposit.deposit_id,
-        user_id=deposit.user_id,
-        amount=deposit.amount,
-        deposit_time=deposit.deposit_time,
-        user=user_data
-    )
+# Most items a single batch lookup may ask for
+MAX_BATCH_ITEMS = 100
 
-# Helper function to convert database results to EnhancedTransactionOut format
-def _format_enhanced_transaction(transaction, seller, buyer, item=None):
-    """Helper function to format transaction with user and item details"""
-    seller_data = UserOut(
-        user_id=seller.user_id,
-        username=seller.username,
-        email=seller.email,
-        role=seller.role,
-        cash_balance=seller.cash_balance,
-        created_at=seller.created_at
-    )
-    
-    buyer_data = UserOut(
-        user_id=buyer.user_id,
-        username=buyer.username,
-        email=buyer.email,
-        role=buyer.role,
-        cash_balance=buyer.cash_balance,
-        created_at=buyer.created_at
-    )
-    
-    item_data = None
-    if item:
-        item_data = ItemOut(
-            item_id=item.item_id,
-            name=item.name,
-            description=item.description,
-            category=item.category,
-            price=item.price,
-            quantity=item.quantity,
-            status=item.status,
-            seller_user_id=item.seller_user_id,
-            listed_at=item.listed_at,
-            updated_at=item.updated_at
-        )
+
+def _wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for newline-delimited JSON via the Accept header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+# Fields selectable with fields= on the item and transaction searches
+SELLER_ITEM_FIELDS = Projection(
+    "SellerItem",
+    {"": (Item, ItemOut), "seller": (User, UserOut)},
+    SellerItemPage
+)
+ENHANCED_TRANSACTION_FIELDS = Projection(
+    "EnhancedTransaction",
+    {"": (Transaction, TransactionOut), "seller": (SellerUser, UserOut), "buyer": (BuyerUser, UserOut), "item": (Item, ItemOut)},
+    EnhancedTransactionPage
+)
+
+
+def _projection_query_args(projection: Projection, paths) -> dict:
+    """Query builder arguments selecting just the columns of the requested fields"""
+    return dict(columns=projection.columns(paths), joins=projection.joins(paths))
+
+
+def _projection_formatter(projection: Projection, paths):
+    """Formatter turning a row of projected columns into the fieldset's lean model"""
+    model = projection.model(paths)
+    return lambda *row: model(**projection.to_dict(paths, row))
+
+
+def _projected_results(projection: Projection, paths, rows) -> list:
+    """Format a page of projected rows (single-column pages come back as bare values)"""
+    formatter = _projection_formatter(projection, paths)
+    return [formatter(*row) if len(paths) > 1 else formatter(row) for row in rows]
+
+
+def _projection_json(projection: Projection, paths):
+    """Serializer turning a row of projected columns into JSON bytes"""
+    formatter = _projection_formatter(projection, paths)
+    return lambda *row: formatter(*row).model_dump_json().encode()
+
+
+def _ndjson_response(stream_rows, to_json, **filters) -> StreamingResponse:
+    """
+    Stream matching rows as newline-delimited JSON, one serialized object per line.
+
+    The rows are read with their own session, since the request's session is
+    closed once the endpoint returns. The cursor is decoded and the query built
+    before the response starts, so a bad cursor is still answered with a 400;
+    only iterating the rows happens in the response iterator.
+    """
+    resources = ExitStack()
+    db = resources.enter_context(session_scope())
+    try:
+        rows = stream_rows(db=db, **filters)
+    except Exception:
+        resources.close()
+        raise
+
+    def lines():
+        with resources:
+            for row in rows:
+                yield to_json(*row) + b"\n"
+
+    # Also release the session if the client goes away before the body is read
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, background=BackgroundTask(resources.close))
+
+def _seller_item_json(item, seller) -> bytes:
+    return SELLER_ITEM_JSON.dump_json(seller_item_dict(item, seller))
+
+
+def _enhanced_transaction_json(transaction, seller, buyer, item=None) -> bytes:
+    return ENHANCED_TRANSACTION_JSON.dump_json(enhanced_transaction_dict(transaction, seller, buyer, item))
+
+def _filter_values(values) -> Optional[tuple]:
+    """Distinct non-empty values of a repeatable filter in a canonical order, or None"""
+    return tuple(sorted({value for value in values if value})) or None
+
+# Helper function to look up a single item with its seller
+def _get_seller_item(db: Session, item_id: int) -> bytes:
+    """Get an item with seller details by ID as JSON, raising 404 if it doesn't exist"""
+    result = enhanced_search_item_by_id(db=db, item_id=item_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Item not found")
+        
+    item, seller = result
+    return _seller_item_json(item, seller)
+
+# Helper function to look up many items with their sellers
+def _get_seller_items(db: Session, item_ids: List[int]) -> bytes:
+    """Get items with seller details as JSON in request order, with null (and an entry in missing) for unknown IDs"""
+    if len(item_ids) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} items can be requested at once")
     
-    return EnhancedTransactionOut(
-        transaction_id=transaction.transaction_id,
-        item_id=transaction.item_id,
-        seller_user_id=transaction.seller_user_id,
-        buyer_user_id=transaction.buyer_user_id,
-        quantity_purchased=transaction.quantity_purchased,
-        purchase_price=transaction.purchase_price,
-        total_amount=transaction.total_amount,
-        transaction_time=transaction.transaction_time,
-        seller=seller_data,
-        buyer=buyer_data,
-        item=item_data
-    )
+    found = enhanced_search_items_by_ids(db=db, item_ids=list(dict.fromkeys(item_ids)))
+    results = [seller_item_dict(*found[item_id]) if item_id in found else None for item_id in item_ids]
+    missing = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in found]
+    return SELLER_ITEM_BATCH_JSON.dump_json({"results": results, "missing": missing})
+
 
 # ==================
 # ITEM ENDPOINTS
 # ==================
 
-@search_router.get("/items/search", response_model=Union[List[SellerItemOut], SellerItemOut])
-async def search_items_endpoint(
+@search_router.get("/items/search", response_model=Union[SellerItemPage, SideloadedItemPage, SellerItemOut])
+def search_items_endpoint(
+    request: Request,
     item_id: Optional[int] = Query(None, description="Get a specific item by ID"),
     name: Optional[str] = Query(None, description="Search by item name"),
-    category: Optional[str] = Query(None, description="Filter by category"),
+    fuzzy: bool = Query(False, description="Tolerate typos in name, ranking close matches first"),
+    sort: Optional[ItemSort] = Query(None, description="Order by price_asc, price_desc, newest or best_selling instead of relevance"),
+    category: Optional[List[str]] = Query(None, description="Filter by category; repeat for any of several categories"),
     min_price: Optional[float] = Query(None, description="Minimum price"),
     max_price: Optional[float] = Query(None, description="Maximum price"),
-    status: Optional[item_status] = Query(item_status.for_sale, description="Filter by status"),
-    seller_id: Optional[int] = Query(None, description="Filter by seller ID"),
+    status: Optional[List[item_status]] = Query([item_status.for_sale], description="Filter by status; repeat for any of several statuses"),
+    seller_id: Optional[List[int]] = Query(None, description="Filter by seller ID; repeat for any of several sellers"),
     min_quantity: Optional[int] = Query(None, description="Minimum available quantity"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items per page"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. name,price,seller.username"),
+    facets: bool = Query(False, description="Include category, status and price bucket counts for the filters"),
+    sideload: bool = Query(False, description="List each seller once in a top-level sellers map instead of in every item"),
     db: Session = Depends(get_db)
 ):
     """
@@ -166,41 +231,136 @@ async def search_items_endpoint(
     
     This endpoint allows flexible searching:
     - If item_id is provided: returns a single item with complete seller details
-    - Without item_id: returns a list of items matching the search criteria
+    - Without item_id: returns a page of items matching the search criteria
+      (all for_sale items when no filters are given) and a next_cursor to
+      pass back as cursor for the following page
+    - category, status and seller_id can be repeated to match items with any
+      of the values in one query; each category matches as a substring
+    - With fuzzy=true: name is matched through an in-memory trigram index, so
+      misspelled names still find items; best matches come first
+    - With sort: results are ordered by price, listing date or units sold
+      (instead of name relevance or item ID)
+    - With facets=true: the page also carries per-category, per-status and
+      price bucket counts over every item matching the filters
+    - With fields: only the listed item fields (and `seller.<field>` seller
+      fields) are selected and returned, the seller is joined only when asked for
+    - With sideload=true: items carry only seller_user_id and each seller
+      appears once in a top-level sellers map keyed by user ID (ignored with fields)
+    - With `Accept: application/x-ndjson`: streams every matching item (after
+      cursor, ignoring limit) as one JSON object per line
     
     All items include full seller information.
     """
     # Single item search by ID
     if item_id is not None:
-        result = enhanced_search_item_by_id(db=db, item_id=item_id)
+        return json_response(catalog_cache.get_or_set(("search_item", item_id), lambda: _get_seller_item(db, item_id)))
+    
+    filters = dict(
+        name=normalize_term(name) or None,
+        category=_filter_values(normalize_term(value) for value in category or ()),
+        min_price=min_price,
+        max_price=max_price,
+        status=_filter_values(status or ()),
+        seller_id=_filter_values(seller_id or ()),
+        min_quantity=min_quantity,
+        fuzzy=fuzzy,
+        sort=sort,
+        cursor=cursor
+    )
+    
+    paths = SELLER_ITEM_FIELDS.parse(fields)
+    
+    # Export every match as NDJSON
+    if _wants_ndjson(request):
+        if paths:
+            return _ndjson_response(
+                stream_enhanced_search_items,
+                _projection_json(SELLER_ITEM_FIELDS, paths),
+                **_projection_query_args(SELLER_ITEM_FIELDS, paths),
+                **filters
+            )
+        return _ndjson_response(stream_enhanced_search_items, _seller_item_json, **filters)
+    
+    # Multi-item search by criteria, cached as JSON on the normalized filter set
+    def search_page() -> bytes:
+        facet_counts = None
+        if facets:
+            facet_filters = {key: value for key, value in filters.items() if key not in ("cursor", "sort")}
+            facet_counts = item_search_facets(db=db, **facet_filters)
         
-        if not result:
-            raise HTTPException(status_code=404, detail="Item not found")
-            
-        item, seller = result
-        return _format_seller_item(item, seller)
+        if paths:
+            results, next_cursor = enhanced_search_items(
+                db=db, limit=limit, **_projection_query_args(SELLER_ITEM_FIELDS, paths), **filters
+            )
+            return SELLER_ITEM_FIELDS.page_model(paths)(
+                results=_projected_results(SELLER_ITEM_FIELDS, paths, results),
+                next_cursor=next_cursor,
+                facets=facet_counts
+            ).model_dump_json().encode()
+        
+        if sideload:
+            items, sellers, next_cursor = enhanced_search_items_sideloaded(db=db, limit=limit, **filters)
+            return SIDELOADED_ITEM_PAGE_JSON.dump_json({
+                "results": [item_dict(item) for item in items],
+                "sellers": {user_id: user_dict(seller) for user_id, seller in sellers.items()},
+                "next_cursor": next_cursor,
+                "facets": facet_counts
+            })
+        
+        results, next_cursor = enhanced_search_items(db=db, limit=limit, **filters)
+        
+        return SELLER_ITEM_PAGE_JSON.dump_json({
+            "results": [seller_item_dict(item, seller) for item, seller in results],
+            "next_cursor": next_cursor,
+            "facets": facet_counts
+        })
     
-    # Handle the case where no parameters are provided - return all items
-    if all(param is None for param in [name, category, min_price, max_price, seller_id, min_quantity]) and status == item_status.for_sale:
-        # Default behavior when no filters specified: return all for_sale items
-        results = enhanced_search_items(db=db, status=item_status.for_sale)
-        if not results:
-            return []
-    else:
-        # Multi-item search by criteria
-        results = enhanced_search_items(
-            db=db,
-            name=name,
-            category=category,
-            min_price=min_price,
-            max_price=max_price,
-            status=status,
-            seller_id=seller_id,
-            min_quantity=min_quantity
-        )
+    # Pages that depend on stock are dropped by sales, the rest only by listing edits
+    scope = "search_items_by_stock" if min_quantity is not None or sort == ItemSort.best_selling else "search_items"
+    cache_key = (scope, limit, facets, paths, sideload and not paths, *sorted(filters.items()))
+    return json_response(catalog_cache.get_or_set(cache_key, search_page))
+
+@search_router.get("/items/suggest", response_model=List[SuggestionOut])
+def suggest_items_endpoint(
+    q: str = Query(..., min_length=1, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS, description="Maximum number of suggestions")
+):
+    """
+    Search-as-you-type suggestions for item names and categories.
+    
+    Served from the in-memory suggest index without a database round trip;
+    the best-selling matches come first.
+    """
+    return suggest_index.suggest(q, limit)
+
+@search_router.get("/items/batch", response_model=SellerItemBatch)
+def get_items_batch_endpoint(
+    ids: str = Query(..., description="Comma separated item IDs, e.g. 1,2,3"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get several items with seller details in one request, e.g. for a cart.
+    
+    Results follow the order of ids with null for items that don't exist;
+    those IDs are also listed in missing.
+    """
+    try:
+        item_ids = [int(item_id) for item_id in ids.split(",") if item_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma separated list of item IDs")
+    return json_response(_get_seller_items(db, item_ids))
+
+@search_router.post("/items/batch", response_model=SellerItemBatch)
+def post_items_batch_endpoint(
+    batch: ItemBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Get several items with seller details in one request, for ID lists too long for a query string.
     
-    # Convert the results to our response model format
-    return [_format_seller_item(item, seller) for item, seller in results]
+    Same response as GET /items/batch.
+    """
+    return json_response(_get_seller_items(db, batch.item_ids))
 
 @search_router.get("/items/{item_id}", response_model=SellerItemOut)
 def get_item_endpoint(
@@ -210,55 +370,47 @@ def get_item_endpoint(
     """
     Get detailed information about a specific item by ID, including seller details.
     """
-    result = enhanced_search_item_by_id(db=db, item_id=item_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Item not found")
-        
-    item, seller = result
-    return _format_seller_item(item, seller)
+    return json_response(catalog_cache.get_or_set(("search_item", item_id), lambda: _get_seller_item(db, item_id)))
 
 # ==================
 # USER ENDPOINTS
 # ==================
 
-@search_router.get("/users/search", response_model=List[UserOut])
+@search_router.get("/users/search", response_model=UserPage)
 def search_users_endpoint(
     username: Optional[str] = Query(None, description="Search by username"),
     email: Optional[str] = Query(None, description="Search by email"),
     min_cash_balance: Optional[float] = Query(None, description="Minimum cash balance"),
     max_cash_balance: Optional[float] = Query(None, description="Maximum cash balance"),
     user_id: Optional[int] = Query(None, description="Search by user ID"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of users per page"),
     db: Session = Depends(get_db)
 ):
     """
     Search users by various criteria, including by ID.
     
-    Returns a list of users matching the provided filters.
-    If user_id is provided, returns just that user.
+    Returns a page of users matching the provided filters (all users when no
+    filters are given). If user_id is provided, returns just that user.
     """
     # First handle specific user ID search
     if user_id is not None:
         user = get_user_by_id(db=db, user_id=user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return [user]  # Return as a single-item list for consistency
+        return json_response(USER_PAGE_JSON.dump_json({"results": [user_dict(user)], "next_cursor": None}))  # Return as a single-item page for consistency
     
-    # Handle the case where no parameters are provided - return all users
-    if all(param is None for param in [username, email, min_cash_balance, max_cash_balance]):
-        users = search_users(db=db)
-        if not users:
-            return []
-    else:
-        # Otherwise, perform search by criteria
-        users = search_users(
-            db=db,
-            username=username,
-            email=email,
-            min_cash_balance=min_cash_balance,
-            max_cash_balance=max_cash_balance
-        )
+    users, next_cursor = search_users(
+        db=db,
+        username=username,
+        email=email,
+        min_cash_balance=min_cash_balance,
+        max_cash_balance=max_cash_balance,
+        cursor=cursor,
+        limit=limit
+    )
     
-    return users
+    return json_response(USER_PAGE_JSON.dump_json({"results": [user_dict(user) for user in users], "next_cursor": next_cursor}))
 
 @search_router.get("/users/{user_id}", response_model=UserOut)
 def get_user_endpoint(  
@@ -269,24 +421,28 @@ def get_user_endpoint(
     user = get_user_by_id(db=db, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return json_response(USER_JSON.dump_json(user_dict(user)))
 
 # ==================
 # DEPOSIT ENDPOINTS
 # ==================
 
-@search_router.get("/deposits/search", response_model=List[EnhancedDepositOut])
+@search_router.get("/deposits/search", response_model=EnhancedDepositPage)
 def search_deposits_endpoint(
     user_id: Optional[int] = Query(None, description="Search by user ID"),
     min_amount: Optional[float] = Query(None, description="Minimum deposit amount"),
     max_amount: Optional[float] = Query(None, description="Maximum deposit amount"),
+    time_from: Optional[datetime] = Query(None, alias="from", description="Only deposits made at or after this time"),
+    time_to: Optional[datetime] = Query(None, alias="to", description="Only deposits made before this time"),
     deposit_id: Optional[int] = Query(None, description="Search by deposit ID"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of deposits per page"),
     db: Session = Depends(get_db)
 ):
     """
-    Search deposits by user ID, amount range, or specific ID.
+    Search deposits by user ID, amount range, time range, or specific ID.
     
-    Returns deposits with full user details.
+    Returns a page of deposits (newest first) with full user details.
     If deposit_id is provided, returns just that deposit.
     """
     # First handle specific deposit ID search
@@ -295,23 +451,58 @@ def search_deposits_endpoint(
         if not result:
             raise HTTPException(status_code=404, detail="Deposit not found")
         deposit, user = result
-        return [_format_enhanced_deposit(deposit, user)]  # Return as a single-item list for consistency
+        return json_response(ENHANCED_DEPOSIT_PAGE_JSON.dump_json({
+            "results": [enhanced_deposit_dict(deposit, user)],
+            "next_cursor": None
+        }))  # Return as a single-item page for consistency
     
-    # Handle the case where no parameters are provided - return all deposits
-    if all(param is None for param in [user_id, min_amount, max_amount]):
-        results = enhanced_search_deposits(db=db)
-        if not results:
-            return []
-    else:
-        # Otherwise, perform search by criteria
-        results = enhanced_search_deposits(
-            db=db, 
-            user_id=user_id, 
-            min_amount=min_amount, 
-            max_amount=max_amount
-        )
+    results, next_cursor = enhanced_search_deposits(
+        db=db, 
+        user_id=user_id, 
+        min_amount=min_amount, 
+        max_amount=max_amount,
+        time_from=time_from,
+        time_to=time_to,
+        cursor=cursor,
+        limit=limit
+    )
+    
+    return json_response(ENHANCED_DEPOSIT_PAGE_JSON.dump_json({
+        "results": [enhanced_deposit_dict(deposit, user) for deposit, user in results],
+        "next_cursor": next_cursor
+    }))
+
+@search_router.get("/deposits/daily", response_model=DepositDailyPage)
+def deposit_daily_totals_endpoint(
+    user_id: Optional[int] = Query(None, description="Search by user ID"),
+    min_amount: Optional[float] = Query(None, description="Minimum deposit amount"),
+    max_amount: Optional[float] = Query(None, description="Maximum deposit amount"),
+    time_from: Optional[datetime] = Query(None, alias="from", description="Only deposits made at or after this time"),
+    time_to: Optional[datetime] = Query(None, alias="to", description="Only deposits made before this time"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of days per page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Number and sum of the deposits matching the search filters, per day.
+    
+    Returns a page of days (newest first); days without matching deposits are omitted.
+    """
+    results, next_cursor = deposit_daily_totals(
+        db=db,
+        user_id=user_id,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        time_from=time_from,
+        time_to=time_to,
+        cursor=cursor,
+        limit=limit
+    )
     
-    return [_format_enhanced_deposit(deposit, user) for deposit, user in results]
+    return json_response(DEPOSIT_DAILY_PAGE_JSON.dump_json({
+        "results": [deposit_day_total_dict(*row) for row in results],
+        "next_cursor": next_cursor
+    }))
 
 @search_router.get("/deposits/{deposit_id}", response_model=EnhancedDepositOut)
 def get_deposit_endpoint(
@@ -323,14 +514,15 @@ def get_deposit_endpoint(
     if not result:
         raise HTTPException(status_code=404, detail="Deposit not found")
     deposit, user = result
-    return _format_enhanced_deposit(deposit, user)
+    return json_response(ENHANCED_DEPOSIT_JSON.dump_json(enhanced_deposit_dict(deposit, user)))
 
 # ==================
 # TRANSACTION ENDPOINTS
 # ==================
 
-@search_router.get("/transactions/search", response_model=List[EnhancedTransactionOut])
+@search_router.get("/transactions/search", response_model=EnhancedTransactionPage)
 def search_transactions_endpoint(
+    request: Request,
     item_id: Optional[int] = Query(None, description="Search by item ID"),
     buyer_user_id: Optional[int] = Query(None, description="Search by buyer user ID"),
     seller_user_id: Optional[int] = Query(None, description="Search by seller user ID"),
@@ -339,13 +531,20 @@ def search_transactions_endpoint(
     min_total_amount: Optional[float] = Query(None, description="Minimum total amount"),
     max_total_amount: Optional[float] = Query(None, description="Maximum total amount"),
     transaction_id: Optional[int] = Query(None, description="Search by transaction ID"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of transactions per page"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. transaction_id,total_amount,buyer.username"),
     db: Session = Depends(get_db)
 ):
     """
     Search transactions by various criteria, including by ID.
     
-    Returns transactions with full user and item details.
+    Returns a page of transactions (newest first) with full user and item details.
     If transaction_id is provided, returns just that transaction.
+    With `Accept: application/x-ndjson`, streams every matching transaction
+    (after cursor, ignoring limit) as one JSON object per line.
+    With fields, only the listed transaction fields (and `seller.`, `buyer.`
+    and `item.` fields) are selected and returned.
     """
     # First handle specific transaction ID search
     if transaction_id is not None:
@@ -353,27 +552,50 @@ def search_transactions_endpoint(
         if not result:
             raise HTTPException(status_code=404, detail="Transaction not found")
         transaction, seller, buyer, item = result
-        return [_format_enhanced_transaction(transaction, seller, buyer, item)]  # Return as a single-item list for consistency
+        return json_response(ENHANCED_TRANSACTION_PAGE_JSON.dump_json({
+            "results": [enhanced_transaction_dict(transaction, seller, buyer, item)],
+            "next_cursor": None
+        }))  # Return as a single-item page for consistency
+    
+    filters = dict(
+        item_id=item_id,
+        buyer_user_id=buyer_user_id,
+        seller_user_id=seller_user_id,
+        min_quantity=min_quantity,
+        max_quantity=max_quantity,
+        min_total_amount=min_total_amount,
+        max_total_amount=max_total_amount,
+        cursor=cursor
+    )
     
-    # Handle the case where no parameters are provided - return all transactions
-    if all(param is None for param in [item_id, buyer_user_id, seller_user_id, min_quantity, max_quantity, min_total_amount, max_total_amount]):
-        results = enhanced_search_transactions(db=db)
-        if not results:
-            return []
-    else:
-        # Otherwise, perform search by criteria
-        results = enhanced_search_transactions(
-            db=db,
-            item_id=item_id,
-            buyer_user_id=buyer_user_id,
-            seller_user_id=seller_user_id,
-            min_quantity=min_quantity,
-            max_quantity=max_quantity,
-            min_total_amount=min_total_amount,
-            max_total_amount=max_total_amount
+    paths = ENHANCED_TRANSACTION_FIELDS.parse(fields)
+    
+    # Export every match as NDJSON
+    if _wants_ndjson(request):
+        if paths:
+            return _ndjson_response(
+                stream_enhanced_search_transactions,
+                _projection_json(ENHANCED_TRANSACTION_FIELDS, paths),
+                **_projection_query_args(ENHANCED_TRANSACTION_FIELDS, paths),
+                **filters
+            )
+        return _ndjson_response(stream_enhanced_search_transactions, _enhanced_transaction_json, **filters)
+    
+    if paths:
+        results, next_cursor = enhanced_search_transactions(
+            db=db, limit=limit, **_projection_query_args(ENHANCED_TRANSACTION_FIELDS, paths), **filters
         )
+        return json_response(ENHANCED_TRANSACTION_FIELDS.page_model(paths)(
+            results=_projected_results(ENHANCED_TRANSACTION_FIELDS, paths, results),
+            next_cursor=next_cursor
+        ).model_dump_json().encode())
+    
+    results, next_cursor = enhanced_search_transactions(db=db, limit=limit, **filters)
     
-    return [_format_enhanced_transaction(t, s, b, i) for t, s, b, i in results]
+    return json_response(ENHANCED_TRANSACTION_PAGE_JSON.dump_json({
+        "results": [enhanced_transaction_dict(t, s, b, i) for t, s, b, i in results],
+        "next_cursor": next_cursor
+    }))
 
 @search_router.get("/transactions/{transaction_id}", response_model=EnhancedTransactionOut)
 def get_transaction_endpoint(
@@ -385,4 +607,4 @@ def get_transaction_endpoint(
     if not result:
         raise HTTPException(status_code=404, detail="Transaction not found")
     transaction, seller, buyer, item = result
-    return _format_enhanced_transaction(transaction, seller, buyer, item)
+    return json_response(_enhanced_transaction_json(transaction, seller, buyer, item))
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel
 from datetime import datetime
 from api.models.item.model import item_status
@@ -105,4 +105,90 @@ class EnhancedTransactionOut(BaseModel):
     item: Optional[ItemOut] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class FacetCount(BaseModel):
+    """Schema for the number of matching items with one facet value"""
+    value: str
+    count: int
+
+
+class PriceBucketCount(BaseModel):
+    """Schema for the number of matching items in a price range (max_price exclusive, None when open-ended)"""
+    min_price: float
+    max_price: Optional[float] = None
+    count: int
+
+
+class ItemFacets(BaseModel):
+    """Schema for item search facet counts over the whole filtered result set"""
+    categories: List[FacetCount]
+    statuses: List[FacetCount]
+    price_buckets: List[PriceBucketCount]
+
+
+class ItemBatchRequest(BaseModel):
+    """Schema for looking up many items at once"""
+    item_ids: List[int]
+
+
+class SellerItemBatch(BaseModel):
+    """Schema for a batch item lookup: one entry per requested ID, in request order, None when not found"""
+    results: List[Optional[SellerItemOut]]
+    missing: List[int]
+
+
+class SuggestionOut(BaseModel):
+    """Schema for a search-as-you-type suggestion (an item, or a category when kind is "category")"""
+    text: str
+    kind: str
+    item_id: Optional[int] = None
+    category: Optional[str] = None
+    price: Optional[float] = None
+
+
+class SellerItemPage(BaseModel):
+    """Schema for a page of item search results"""
+    results: List[SellerItemOut]
+    next_cursor: Optional[str] = None
+    facets: Optional[ItemFacets] = None
+
+
+class SideloadedItemPage(BaseModel):
+    """Schema for a page of item search results with each seller listed once, keyed by user ID"""
+    results: List[ItemOut]
+    sellers: Dict[int, UserOut]
+    next_cursor: Optional[str] = None
+    facets: Optional[ItemFacets] = None
+
+
+class UserPage(BaseModel):
+    """Schema for a page of user search results"""
+    results: List[UserOut]
+    next_cursor: Optional[str] = None
+
+
+class EnhancedDepositPage(BaseModel):
+    """Schema for a page of deposit search results"""
+    results: List[EnhancedDepositOut]
+    next_cursor: Optional[str] = None
+
+
+class DepositDayTotal(BaseModel):
+    """Schema for the number and sum of one day's deposits"""
+    day: datetime
+    deposit_count: int
+    total_amount: float
+
+
+class DepositDailyPage(BaseModel):
+    """Schema for a page of per-day deposit totals"""
+    results: List[DepositDayTotal]
+    next_cursor: Optional[str] = None
+
+
+class EnhancedTransactionPage(BaseModel):
+    """Schema for a page of transaction search results"""
+    results: List[EnhancedTransactionOut]
+    next_cursor: Optional[str] = None
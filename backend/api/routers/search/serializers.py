@@ -0,0 +1,210 @@
+"""
+JSON fast path for search responses.
+
+Search rows are turned into plain dicts holding exactly the JSON types of the
+schemas in schemas.py (floats for amounts, enum values as strings) and
+serialized to bytes in one pass by TypeAdapters over TypedDict mirrors of those
+schemas. Endpoints return the bytes directly, skipping both the construction
+of nested response models and FastAPI's response_model validation; the
+schemas still describe the responses in OpenAPI.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+
+class UserDict(TypedDict):
+    user_id: int
+    username: str
+    email: str
+    role: str
+    cash_balance: float
+    created_at: datetime
+
+
+class ItemDict(TypedDict):
+    item_id: int
+    name: str
+    description: Optional[str]
+    category: Optional[str]
+    price: float
+    quantity: int
+    status: str
+    seller_user_id: int
+    listed_at: datetime
+    updated_at: datetime
+
+
+class SellerItemDict(ItemDict):
+    seller: Optional[UserDict]
+
+
+class EnhancedDepositDict(TypedDict):
+    deposit_id: int
+    user_id: int
+    amount: float
+    deposit_time: datetime
+    user: Optional[UserDict]
+
+
+class EnhancedTransactionDict(TypedDict):
+    transaction_id: int
+    item_id: int
+    seller_user_id: int
+    buyer_user_id: int
+    quantity_purchased: int
+    purchase_price: float
+    total_amount: float
+    transaction_time: datetime
+    seller: Optional[UserDict]
+    buyer: Optional[UserDict]
+    item: Optional[ItemDict]
+
+
+class FacetCountDict(TypedDict):
+    value: str
+    count: int
+
+
+class PriceBucketCountDict(TypedDict):
+    min_price: float
+    max_price: Optional[float]
+    count: int
+
+
+class ItemFacetsDict(TypedDict):
+    categories: List[FacetCountDict]
+    statuses: List[FacetCountDict]
+    price_buckets: List[PriceBucketCountDict]
+
+
+class SellerItemPageDict(TypedDict):
+    results: List[SellerItemDict]
+    next_cursor: Optional[str]
+    facets: Optional[ItemFacetsDict]
+
+
+class SideloadedItemPageDict(TypedDict):
+    results: List[ItemDict]
+    sellers: Dict[int, UserDict]
+    next_cursor: Optional[str]
+    facets: Optional[ItemFacetsDict]
+
+
+class SellerItemBatchDict(TypedDict):
+    results: List[Optional[SellerItemDict]]
+    missing: List[int]
+
+
+class UserPageDict(TypedDict):
+    results: List[UserDict]
+    next_cursor: Optional[str]
+
+
+class EnhancedDepositPageDict(TypedDict):
+    results: List[EnhancedDepositDict]
+    next_cursor: Optional[str]
+
+
+class DepositDayTotalDict(TypedDict):
+    day: datetime
+    deposit_count: int
+    total_amount: float
+
+
+class DepositDailyPageDict(TypedDict):
+    results: List[DepositDayTotalDict]
+    next_cursor: Optional[str]
+
+
+class EnhancedTransactionPageDict(TypedDict):
+    results: List[EnhancedTransactionDict]
+    next_cursor: Optional[str]
+
+
+# Built once at import; each holds the compiled serializer for its shape
+SELLER_ITEM_JSON = TypeAdapter(SellerItemDict)
+SELLER_ITEM_PAGE_JSON = TypeAdapter(SellerItemPageDict)
+SIDELOADED_ITEM_PAGE_JSON = TypeAdapter(SideloadedItemPageDict)
+SELLER_ITEM_BATCH_JSON = TypeAdapter(SellerItemBatchDict)
+USER_JSON = TypeAdapter(UserDict)
+USER_PAGE_JSON = TypeAdapter(UserPageDict)
+ENHANCED_DEPOSIT_JSON = TypeAdapter(EnhancedDepositDict)
+ENHANCED_DEPOSIT_PAGE_JSON = TypeAdapter(EnhancedDepositPageDict)
+DEPOSIT_DAILY_PAGE_JSON = TypeAdapter(DepositDailyPageDict)
+ENHANCED_TRANSACTION_JSON = TypeAdapter(EnhancedTransactionDict)
+ENHANCED_TRANSACTION_PAGE_JSON = TypeAdapter(EnhancedTransactionPageDict)
+
+
+def user_dict(user) -> UserDict:
+    return {
+        "user_id": user.user_id,
+        "username": user.username,
+        "email": user.email,
+        "role": user.role.value,
+        "cash_balance": float(user.cash_balance),
+        "created_at": user.created_at,
+    }
+
+
+def item_dict(item) -> ItemDict:
+    return {
+        "item_id": item.item_id,
+        "name": item.name,
+        "description": item.description,
+        "category": item.category,
+        "price": float(item.price),
+        "quantity": item.quantity,
+        "status": item.status.value,
+        "seller_user_id": item.seller_user_id,
+        "listed_at": item.listed_at,
+        "updated_at": item.updated_at,
+    }
+
+
+def seller_item_dict(item, seller) -> SellerItemDict:
+    result = item_dict(item)
+    result["seller"] = user_dict(seller)
+    return result
+
+
+def enhanced_deposit_dict(deposit, user) -> EnhancedDepositDict:
+    return {
+        "deposit_id": deposit.deposit_id,
+        "user_id": deposit.user_id,
+        "amount": float(deposit.amount),
+        "deposit_time": deposit.deposit_time,
+        "user": user_dict(user),
+    }
+
+
+def deposit_day_total_dict(day, deposit_count, total_amount) -> DepositDayTotalDict:
+    return {
+        "day": day,
+        "deposit_count": deposit_count,
+        "total_amount": float(total_amount),
+    }
+
+
+def enhanced_transaction_dict(transaction, seller, buyer, item=None) -> EnhancedTransactionDict:
+    return {
+        "transaction_id": transaction.transaction_id,
+        "item_id": transaction.item_id,
+        "seller_user_id": transaction.seller_user_id,
+        "buyer_user_id": transaction.buyer_user_id,
+        "quantity_purchased": transaction.quantity_purchased,
+        "purchase_price": float(transaction.purchase_price),
+        "total_amount": float(transaction.total_amount),
+        "transaction_time": transaction.transaction_time,
+        "seller": user_dict(seller),
+        "buyer": user_dict(buyer),
+        "item": item_dict(item) if item else None,
+    }
+
+
+def json_response(content: bytes) -> Response:
+    """Response for a body that is already serialized JSON"""
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,281 @@
+"""
+In-memory prefix index for search-as-you-type suggestions.
+
+Every word of a for-sale item's name (and of its category) is stored as a
+prefix key in a sorted list, so a lookup never touches the database.
+Suggestions are ranked by units sold. The best matches for the shortest
+prefixes, whose ranges are the largest, are kept precomputed; a longer prefix
+is answered from the list of its first TOP_PREFIX_LENGTH characters when
+enough of those match it, and otherwise by ranking its whole key range.
+
+The index is loaded at startup, rebuilt in the background to pick up writes
+made by other worker processes, and patched from api.events whenever an item
+is written (or sold) in between. A patch moves only the written item and its
+category within the precomputed lists. Each list holds the exact best refs of
+its prefix down to its last entry; when a ref drops below the last entry it is
+left out rather than searched for, and only a list that shrinks below
+MAX_SUGGESTIONS is re-ranked from its key range.
+"""
+import heapq
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from api.events import on_item_change
+from api.models.item.model import Item, item_status
+from api.routers.search.text_search import normalize_term
+
+logger = logging.getLogger("suggest")
+
+SUGGEST_INDEX_REFRESH_SECONDS = float(os.getenv("SUGGEST_INDEX_REFRESH_SECONDS", 300))
+
+# Prefixes up to this length get their top suggestions precomputed
+TOP_PREFIX_LENGTH = 3
+TOP_SUGGESTIONS = 40
+
+# Most suggestions a lookup returns; a precomputed list shorter than this is re-ranked
+MAX_SUGGESTIONS = 20
+
+# (kind, id): ("item", item_id) or ("category", normalized category)
+Ref = Tuple[str, Any]
+
+
+def _word_keys(text: str) -> Set[str]:
+    """Keys under which text is found: the whole normalized text and each word suffix of it"""
+    words = normalize_term(text).split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def _is_suggestible(item: Item) -> bool:
+    return item.status == item_status.for_sale and item.quantity > 0
+
+
+class SuggestIndex:
+    """Sorted prefix keys over item names and categories, ranked by sales weight"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, Ref]] = []
+        self._payloads: Dict[Ref, Dict[str, Any]] = {}
+        self._weights: Dict[Ref, float] = {}
+        self._item_keys: Dict[int, Set[str]] = {}
+        self._category_items: Dict[str, Set[int]] = {}
+        self._top: Dict[str, List[Ref]] = {}
+        # Prefixes whose precomputed list doesn't hold every ref matching them
+        self._partial_tops: Set[str] = set()
+        # Items written while a rebuild reads the database, re-applied after it swaps in
+        self._pending: Optional[Dict[int, Item]] = None
+
+    # -- lookups --------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Best-selling items and categories with a word starting with prefix"""
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            if len(prefix) <= TOP_PREFIX_LENGTH:
+                refs = self._top.get(prefix, [])
+            else:
+                # The shorter prefix's list ranks a superset of this prefix's matches,
+                # so the ones in it that match are this prefix's best
+                shorter = prefix[:TOP_PREFIX_LENGTH]
+                refs = [ref for ref in self._top.get(shorter, ()) if self._ref_matches(ref, prefix)]
+                if len(refs) < limit and shorter in self._partial_tops:
+                    refs = self._rank(self._matching(prefix), limit)
+            return [dict(self._payloads[ref]) for ref in refs[:limit]]
+
+    def _matching(self, prefix: str) -> Set[Ref]:
+        matches = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+            matches.add(self._keys[position][1])
+            position += 1
+        return matches
+
+    def _rank_key(self, ref: Ref) -> Tuple[float, str]:
+        return -self._weights[ref], self._payloads[ref]["text"].lower()
+
+    def _rank(self, refs: Iterable[Ref], limit: int) -> List[Ref]:
+        return heapq.nsmallest(limit, refs, key=self._rank_key)
+
+    def _ref_keys(self, ref: Ref) -> Set[str]:
+        kind, ref_id = ref
+        return self._item_keys[ref_id] if kind == "item" else _word_keys(self._payloads[ref]["text"])
+
+    def _ref_matches(self, ref: Ref, prefix: str) -> bool:
+        return any(key.startswith(prefix) for key in self._ref_keys(ref))
+
+    # -- writes ---------------------------------------------------------------
+
+    def load(self, rows: Iterable[Tuple[int, str, Optional[str], Any, float]]) -> None:
+        """Replace the index with (item_id, name, category, price, units_sold) rows"""
+        fresh = SuggestIndex()
+        for item_id, name, category, price, units_sold in rows:
+            fresh._add_item(item_id, name, category, price, units_sold)
+        fresh._keys.sort()
+        fresh._refresh_top(fresh._all_top_prefixes())
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._keys = fresh._keys
+            self._payloads = fresh._payloads
+            self._weights = fresh._weights
+            self._item_keys = fresh._item_keys
+            self._category_items = fresh._category_items
+            self._top = fresh._top
+            self._partial_tops = fresh._partial_tops
+        for item in (pending or {}).values():
+            self.patch(item)
+
+    def begin_rebuild(self) -> None:
+        """Start recording item writes so a rebuild in progress doesn't lose them"""
+        with self._lock:
+            self._pending = {}
+
+    def patch(self, item: Item) -> None:
+        """Bring one item (and its category) up to date after a write"""
+        item_id, name, category, price, units_sold = item.item_id, item.name, item.category, item.price, item.units_sold
+        suggestible = _is_suggestible(item)
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending[item_id] = item
+            # The item and its categories before and after are the only refs whose keys or weights change
+            changed = {("item", item_id)}
+            previous = self._payloads.get(("item", item_id))
+            for value in (previous and previous["category"], category):
+                if normalize_term(value):
+                    changed.add(("category", normalize_term(value)))
+
+            touched = self._remove_item(item_id)
+            if suggestible:
+                touched |= self._add_item(item_id, name, category, price, units_sold, sorted_insert=True)
+
+            current = {ref: self._ref_keys(ref) for ref in changed if ref in self._weights}
+            for prefix in {key[:length] for key in touched for length in range(1, TOP_PREFIX_LENGTH + 1)}:
+                self._update_top(prefix, changed, current)
+
+    def _add_item(self, item_id, name, category, price, units_sold, sorted_insert=False) -> Set[str]:
+        add = insort if sorted_insert else list.append
+        ref = ("item", item_id)
+        keys = _word_keys(name)
+        for key in keys:
+            add(self._keys, (key, ref))
+        self._payloads[ref] = {
+            "text": name, "kind": "item", "item_id": item_id, "category": category, "price": float(price)
+        }
+        self._weights[ref] = units_sold or 0
+        self._item_keys[item_id] = keys
+
+        category_key = normalize_term(category)
+        if category_key:
+            category_ref = ("category", category_key)
+            members = self._category_items.setdefault(category_key, set())
+            if not members:
+                category_keys = _word_keys(category)
+                for key in category_keys:
+                    add(self._keys, (key, category_ref))
+                keys = keys | category_keys
+                self._payloads[category_ref] = {
+                    "text": category, "kind": "category", "item_id": None, "category": category, "price": None
+                }
+                self._weights[category_ref] = 0
+            members.add(item_id)
+            self._weights[category_ref] += self._weights[ref]
+        return keys
+
+    def _remove_item(self, item_id: int) -> Set[str]:
+        ref = ("item", item_id)
+        keys = self._item_keys.pop(item_id, None)
+        if keys is None:
+            return set()
+        for key in keys:
+            self._keys.pop(bisect_left(self._keys, (key, ref)))
+
+        payload = self._payloads.pop(ref)
+        weight = self._weights.pop(ref)
+        category_key = normalize_term(payload["category"])
+        if category_key:
+            category_ref = ("category", category_key)
+            members = self._category_items[category_key]
+            members.discard(item_id)
+            self._weights[category_ref] -= weight
+            if not members:
+                category_keys = _word_keys(self._payloads.pop(category_ref)["text"])
+                for key in category_keys:
+                    self._keys.pop(bisect_left(self._keys, (key, category_ref)))
+                del self._weights[category_ref]
+                del self._category_items[category_key]
+                keys = keys | category_keys
+        return keys
+
+    def _all_top_prefixes(self) -> Set[str]:
+        return {key[:length] for key, _ in self._keys for length in range(1, TOP_PREFIX_LENGTH + 1)}
+
+    def _refresh_top(self, prefixes: Iterable[str]) -> None:
+        """Rank the precomputed lists of prefixes from their whole key ranges"""
+        for prefix in prefixes:
+            matches = self._matching(prefix)
+            refs = self._rank(matches, TOP_SUGGESTIONS)
+            if refs:
+                self._top[prefix] = refs
+            else:
+                self._top.pop(prefix, None)
+            if len(matches) > len(refs):
+                self._partial_tops.add(prefix)
+            else:
+                self._partial_tops.discard(prefix)
+
+    def _update_top(self, prefix: str, changed: Set[Ref], current: Dict[Ref, Set[str]]) -> None:
+        """
+        Move the changed refs within prefix's precomputed list.
+
+        current holds the keys of the changed refs that are still indexed. A ref
+        goes (back) in only where its place is certain: anywhere in a list of
+        every match, otherwise ahead of the last entry, since an unlisted ref
+        might rank between the two.
+        """
+        refs = [ref for ref in self._top.get(prefix, ()) if ref not in changed]
+        partial = prefix in self._partial_tops
+        for ref, keys in current.items():
+            if not any(key.startswith(prefix) for key in keys):
+                continue
+            if not partial or (refs and self._rank_key(ref) < self._rank_key(refs[-1])):
+                insort(refs, ref, key=self._rank_key)
+
+        if len(refs) > TOP_SUGGESTIONS:
+            del refs[TOP_SUGGESTIONS:]
+            self._partial_tops.add(prefix)
+            partial = True
+        if partial and len(refs) < MAX_SUGGESTIONS:
+            self._refresh_top([prefix])
+        elif refs:
+            self._top[prefix] = refs
+        else:
+            self._top.pop(prefix, None)
+
+
+suggest_index = SuggestIndex()
+
+
+def rebuild_suggest_index(db: Session) -> None:
+    """Reload the suggest index from every for-sale item and its units sold"""
+    suggest_index.begin_rebuild()
+    rows = (
+        db.query(Item.item_id, Item.name, Item.category, Item.price, Item.units_sold)
+        .filter(Item.status == item_status.for_sale, Item.quantity > 0)
+        .all()
+    )
+    suggest_index.load(rows)
+    logger.info(f"Suggest index loaded with {len(rows)} items")
+
+
+@on_item_change
+def _patch_suggest_index(item: Item) -> None:
+    suggest_index.patch(item)
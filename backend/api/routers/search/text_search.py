@@ -0,0 +1,104 @@
+"""
+Query builder for item text search.
+
+Picks the predicate the item search indexes can serve (see sql/01_db_schema.sql):
+- terms shorter than three characters have no trigrams, so they match the
+  start of the name (idx_items_name_prefix) or of any name or category word in
+  the generated search_vector (idx_items_search_vector), so "tv" still finds
+  "Smart TV"
+- longer terms match the name by substring (idx_items_name_trgm) or the
+  generated search_vector by word prefix (idx_items_search_vector)
+
+Matches on longer terms are ranked by full-text rank plus trigram similarity
+of the name.
+"""
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import Float, cast, func, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from api.models.item.model import Item
+
+# pg_trgm needs at least one full trigram to use the GIN index
+MIN_TRIGRAM_LENGTH = 3
+
+# Text search configuration used by the generated items.search_vector column
+TS_CONFIG = "simple"
+
+_WORD_RE = re.compile(r"\w+")
+
+search_vector = Item.__table__.c.search_vector
+
+
+def normalize_term(term: Optional[str]) -> str:
+    """Lower-case a search term and collapse its whitespace"""
+    if not term:
+        return ""
+    return " ".join(term.lower().split())
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _prefix_tsquery(term: str, weights: str = "") -> Optional[ColumnElement]:
+    """
+    Build a tsquery matching every word of the term as a prefix ('lap & pro' -> 'lap:* & pro:*'),
+    only in the search_vector parts with the given weights ('AB' is name and category) if any
+    """
+    words = _WORD_RE.findall(term)
+    if not words:
+        return None
+    return func.to_tsquery(TS_CONFIG, " & ".join(f"{word}:*{weights}" for word in words))
+
+
+def item_name_search(term: Optional[str]) -> Tuple[Optional[ColumnElement], Optional[ColumnElement], bool]:
+    """
+    Build the filter and sort key for an item name search.
+
+    Args:
+        term: Raw search term from the request
+
+    Returns:
+        (predicate, sort_key, descending) - predicate and sort_key are None for
+        an empty term. Trigram/full-text searches sort by relevance (descending),
+        short word-prefix searches by the lower-cased name (ascending).
+    """
+    term = normalize_term(term)
+    if not term:
+        return None, None, False
+
+    if len(term) < MIN_TRIGRAM_LENGTH:
+        lowered_name = func.lower(Item.name)
+        predicate = lowered_name.like(f"{escape_like(term)}%", escape="\\")
+        # Any word of the name or category, not the description: two letters start far too many of those
+        tsquery = _prefix_tsquery(term, "AB")
+        if tsquery is not None:
+            predicate = or_(predicate, search_vector.op("@@")(tsquery))
+        return predicate, lowered_name, False
+
+    predicate = Item.name.ilike(f"%{escape_like(term)}%", escape="\\")
+    relevance = func.similarity(Item.name, term)
+
+    tsquery = _prefix_tsquery(term)
+    if tsquery is not None:
+        predicate = or_(predicate, search_vector.op("@@")(tsquery))
+        relevance = relevance + func.ts_rank_cd(search_vector, tsquery)
+
+    # Double precision so the score survives a round trip through a cursor unchanged
+    return predicate, cast(relevance, Float), True
+
+
+def item_category_filter(*categories: Optional[str]) -> Optional[ColumnElement]:
+    """
+    Substring match on the item category, any of several categories matching.
+
+    Each category is its own ILIKE so the planner can OR together bitmap scans
+    of idx_items_category_trgm; GIN can't serve an `ILIKE ANY(:patterns)`.
+    """
+    terms = [term for term in map(normalize_term, categories) if term]
+    if not terms:
+        return None
+    return or_(*[Item.category.ilike(f"%{escape_like(term)}%", escape="\\") for term in terms])
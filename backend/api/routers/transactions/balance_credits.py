@@ -0,0 +1,148 @@
+"""
+Append-only ledger of balance credits.
+
+Crediting a seller (or a transfer receiver) by updating their users row makes
+that row a lock hotspot: every sale of a popular seller's items would queue on
+it. Credits are instead appended to balance_credits, which takes no lock on
+the user, and folded into users.cash_balance later:
+
+- by the background compactor, in batches, skipping users and credits that
+  other transactions hold locked so it never waits on a sale, and
+- by a user's own debit (purchase, checkout, transfer), which locks their
+  users row and then takes their pending credits in the same transaction so
+  they can be spent. Every debit path takes the users row lock before the
+  credits, so two debits of one user can't deadlock on them.
+
+A user's balance is therefore cash_balance plus their pending credits.
+"""
+import logging
+import os
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Collection, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("balance_credits")
+
+# Money columns are NUMERIC with two decimal places, rounded half up like Postgres
+CENT = Decimal("0.01")
+
+BALANCE_CREDIT_COMPACT_SECONDS = float(os.getenv("BALANCE_CREDIT_COMPACT_SECONDS", 5))
+BALANCE_CREDIT_COMPACT_BATCH = int(os.getenv("BALANCE_CREDIT_COMPACT_BATCH", 1000))
+
+# Fold one batch of credits into their users' balances. Credits and users that
+# are locked elsewhere are skipped until a later run, so the compactor only ever
+# takes locks that are free and can't deadlock with the purchase paths.
+COMPACT_SQL = text("""
+WITH batch AS (
+    SELECT credit_id, user_id
+    FROM balance_credits
+    ORDER BY credit_id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+), owners AS (
+    SELECT user_id
+    FROM users
+    WHERE user_id IN (SELECT user_id FROM batch)
+    FOR NO KEY UPDATE SKIP LOCKED
+), folded AS (
+    DELETE FROM balance_credits
+    USING batch, owners
+    WHERE balance_credits.credit_id = batch.credit_id AND batch.user_id = owners.user_id
+    RETURNING balance_credits.user_id, balance_credits.amount
+), totals AS (
+    SELECT user_id, SUM(amount) AS amount, COUNT(*) AS credits
+    FROM folded
+    GROUP BY user_id
+), credited AS (
+    UPDATE users
+    SET cash_balance = users.cash_balance + totals.amount
+    FROM totals
+    WHERE users.user_id = totals.user_id
+    RETURNING totals.credits
+)
+SELECT (SELECT COUNT(*) FROM batch) AS claimed, COALESCE(SUM(credits), 0) AS folded
+FROM credited
+""")
+
+# cash_balance and pending credits read in one statement, i.e. from one snapshot,
+# so a fold committing in between can't drop credits from (or count them twice in) the result
+BALANCE_SQL = text("""
+SELECT users.cash_balance + COALESCE(
+    (SELECT SUM(amount) FROM balance_credits WHERE balance_credits.user_id = users.user_id), 0
+)
+FROM users
+WHERE users.user_id = :user_id
+""")
+
+TAKE_SQL = text("""
+WITH taken AS (
+    DELETE FROM balance_credits WHERE user_id = :user_id RETURNING amount
+)
+SELECT COALESCE(SUM(amount), 0) FROM taken
+""")
+
+TAKE_MANY_SQL = text("""
+WITH taken AS (
+    DELETE FROM balance_credits WHERE user_id = ANY(:user_ids) RETURNING user_id, amount
+)
+SELECT user_id, SUM(amount) FROM taken GROUP BY user_id
+""")
+
+CREDIT_SQL = text("""
+INSERT INTO balance_credits (user_id, amount, transaction_id)
+VALUES (:user_id, :amount, :transaction_id)
+""")
+
+
+def as_money(value: float) -> Decimal:
+    """An amount read through a float column as the exact NUMERIC value the database holds"""
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def user_balance(db: Session, user_id: int) -> Optional[float]:
+    """The user's balance, cash_balance plus pending credits, or None if there is no such user"""
+    balance = db.execute(BALANCE_SQL, {"user_id": user_id}).scalar_one_or_none()
+    return None if balance is None else float(balance)
+
+
+def take_pending_credits(db: Session, user_id: int) -> Decimal:
+    """
+    Remove the user's pending credits, returning their sum.
+
+    The caller adds the sum to the user's cash_balance in the same transaction,
+    so the credits are either folded or, on rollback, still pending.
+    """
+    return db.execute(TAKE_SQL, {"user_id": user_id}).scalar_one()
+
+
+def take_pending_credits_of(db: Session, user_ids: Collection[int]) -> Dict[int, Decimal]:
+    """take_pending_credits for several users in one statement; users without credits are left out"""
+    rows = db.execute(TAKE_MANY_SQL, {"user_ids": list(user_ids)}).all()
+    return {user_id: amount for user_id, amount in rows}
+
+
+def add_credits(db: Session, credits: Iterable[Tuple[int, float, Optional[int]]]) -> None:
+    """Append (user_id, amount, transaction_id) credits; the caller commits"""
+    rows = [
+        {"user_id": user_id, "amount": amount, "transaction_id": transaction_id}
+        for user_id, amount, transaction_id in credits
+    ]
+    if rows:
+        db.execute(CREDIT_SQL, rows)
+
+
+def compact_balance_credits(db: Session, batch_size: int = BALANCE_CREDIT_COMPACT_BATCH) -> int:
+    """Fold pending credits into users' balances batch by batch, returning how many were folded"""
+    total = 0
+    while True:
+        claimed, folded = db.execute(COMPACT_SQL, {"batch_size": batch_size}).one()
+        db.commit()
+        total += folded
+        # Stop on a short batch, or when everything claimed belonged to locked users
+        if claimed < batch_size or not folded:
+            break
+    if total:
+        logger.info(f"Folded {total} balance credits")
+    return total
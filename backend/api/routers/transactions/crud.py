@@ -1,14 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_
+from sqlalchemy import insert, select, or_, text
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from decimal import Decimal
 
 # Import all necessary models
 from api.models.transaction.model import Transaction
 from api.models.item.model import Item, item_status
 from api.models.user.model import User
-from .schemas import TransactionCreate, BalanceTransfer
+from api.events import publish_item_change
+from .balance_credits import add_credits, as_money, take_pending_credits, user_balance
+from .flash_sale import flash_sale_purchase, is_flash_sale_item
+from .schemas import TransactionCreate, TransactionResponse, BalanceTransfer, CheckoutRequest, CheckoutResponse
 
 # Define models namespace for cleaner code in some functions
 import api.models.transaction.model as models
@@ -16,6 +20,67 @@ import api.models.item.model as item_models
 import api.models.user.model as user_models
 
 
+# One statement for a whole purchase: take the stock (only while enough is for
+# sale and the buyer isn't the seller), debit the buyer (only if the balance,
+# including the buyer's pending credits, covers it), record the transaction and
+# append the seller's credit to the balance_credits ledger. The row locks taken
+# by the guarded UPDATEs make concurrent purchases of the same item or by the
+# same buyer queue up and re-check their guards instead of overselling; the
+# seller's users row isn't locked at all. When a guard fails no row comes back
+# and the caller rolls the statement back, which also restores the taken credits.
+#
+# Locks are taken item, then buyer's users row, then the buyer's credits, the
+# order checkout, transfers and flash-sale batches use as well. Users rows are
+# locked FOR NO KEY UPDATE so the foreign key checks of concurrent inserts
+# into transactions and balance_credits, which only need KEY SHARE, never wait.
+PURCHASE_SQL = text("""
+WITH sold AS (
+    UPDATE items
+    SET quantity = quantity - :quantity,
+        units_sold = units_sold + :quantity,
+        status = CASE WHEN quantity = :quantity THEN 'sold'::item_status ELSE status END
+    WHERE item_id = :item_id
+      AND status = 'for_sale'
+      AND quantity >= :quantity
+      AND seller_user_id <> :buyer_id
+    RETURNING items.item_id, items.seller_user_id, items.name, items.description, items.category,
+              items.price, items.quantity, items.status, items.units_sold, items.listed_at,
+              items.updated_at, items.price * :quantity AS total_amount
+), buyer AS (
+    SELECT users.user_id
+    FROM users
+    WHERE users.user_id = :buyer_id AND EXISTS (SELECT 1 FROM sold)
+    FOR NO KEY UPDATE
+), taken AS (
+    DELETE FROM balance_credits WHERE user_id = (SELECT user_id FROM buyer) RETURNING amount
+), debit AS (
+    UPDATE users
+    SET cash_balance = users.cash_balance + (SELECT COALESCE(SUM(amount), 0) FROM taken) - sold.total_amount
+    FROM sold
+    WHERE users.user_id = :buyer_id
+      AND users.cash_balance + (SELECT COALESCE(SUM(amount), 0) FROM taken) >= sold.total_amount
+    RETURNING users.user_id
+), recorded AS (
+    INSERT INTO transactions (item_id, buyer_user_id, seller_user_id, quantity_purchased, purchase_price, total_amount)
+    SELECT sold.item_id, debit.user_id, sold.seller_user_id, :quantity, sold.price, sold.total_amount
+    FROM sold, debit
+    RETURNING transaction_id, transaction_time
+), credit AS (
+    INSERT INTO balance_credits (user_id, amount, transaction_id)
+    SELECT sold.seller_user_id, sold.total_amount, recorded.transaction_id
+    FROM sold, recorded
+    RETURNING user_id
+)
+SELECT recorded.transaction_id, recorded.transaction_time, sold.*
+FROM recorded, sold, credit
+""")
+
+ITEM_COLUMNS = (
+    "item_id", "seller_user_id", "name", "description", "category", "price",
+    "quantity", "status", "units_sold", "listed_at", "updated_at",
+)
+
+
 def create_transaction(
     db: Session, 
     transaction_data: TransactionCreate, 
@@ -24,6 +89,11 @@ def create_transaction(
     """
     Create a transaction to purchase an item.
     
+    The stock decrement, both balance updates and the transaction insert run
+    as the single statement PURCHASE_SQL; only a failed purchase reads the
+    item and users again to explain why it failed. Purchases of flash-sale
+    items (FLASH_SALE_ITEM_IDS) go through the item's batching queue instead.
+    
     Args:
         db: Database session
         transaction_data: Transaction creation data
@@ -36,97 +106,227 @@ def create_transaction(
         HTTPException: If item doesn't exist, isn't for sale, insufficient quantity,
                       buyer doesn't have enough funds, or buyer is the seller
     """
-    # Get the item
+    if is_flash_sale_item(transaction_data.item_id):
+        # End the request's read-only transaction so its connection goes back to
+        # the pool while the purchase waits; the batch needs a connection of its own
+        db.rollback()
+        return flash_sale_purchase(transaction_data.item_id, buyer_id, transaction_data.quantity)
+    
+    row = db.execute(PURCHASE_SQL, {
+        "item_id": transaction_data.item_id,
+        "quantity": transaction_data.quantity,
+        "buyer_id": buyer_id,
+    }).mappings().first()
+    
+    if row is None:
+        db.rollback()
+        raise _purchase_failure(db, transaction_data, buyer_id)
+    
+    db.commit()
+    
+    item = Item(**{column: row[column] for column in ITEM_COLUMNS})
+    item.status = item_status(row["status"])
+    publish_item_change(item)
+    
+    return Transaction(
+        transaction_id=row["transaction_id"],
+        item_id=row["item_id"],
+        buyer_user_id=buyer_id,
+        seller_user_id=row["seller_user_id"],
+        quantity_purchased=transaction_data.quantity,
+        purchase_price=row["price"],
+        total_amount=row["total_amount"],
+        transaction_time=row["transaction_time"]
+    )
+
+
+def _purchase_failure(db: Session, transaction_data: TransactionCreate, buyer_id: int) -> HTTPException:
+    """Work out which purchase check failed, for a purchase that PURCHASE_SQL refused"""
     item = db.query(Item).filter(Item.item_id == transaction_data.item_id).first()
     
     if not item:
-        raise HTTPException(
+        return HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item with ID {transaction_data.item_id} not found"
         )
     
     # Check item status
     if item.status != item_status.for_sale:
-        raise HTTPException(
+        return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Item with ID {transaction_data.item_id} is not available for sale"
         )
     
     # Check quantity
     if transaction_data.quantity > item.quantity:
-        raise HTTPException(
+        return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Requested quantity ({transaction_data.quantity}) exceeds available quantity ({item.quantity})"
         )
     
     # Check if buyer is the seller
     if buyer_id == item.seller_user_id:
-        raise HTTPException(
+        return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You cannot purchase your own items"
         )
     
-    # Get buyer
-    buyer = db.query(User).filter(User.user_id == buyer_id).first()
+    # Get buyer's balance, with their pending credits
+    available = user_balance(db, buyer_id)
     
-    if not buyer:
-        raise HTTPException(
+    if available is None:
+        return HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Buyer with ID {buyer_id} not found"
         )
     
-    # Get seller
-    seller = db.query(User).filter(User.user_id == item.seller_user_id).first()
-    
-    if not seller:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Seller with ID {item.seller_user_id} not found"
-        )
-    
     # Calculate total amount
     total_amount = item.price * transaction_data.quantity
     
     # Check if buyer has enough funds
-    if buyer.cash_balance < total_amount:
-        raise HTTPException(
+    if available < total_amount:
+        return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient funds. Required: {total_amount}, Available: {buyer.cash_balance}"
+            detail=f"Insufficient funds. Required: {total_amount}, Available: {available}"
         )
     
-    # Create transaction
-    transaction = Transaction(
-        item_id=item.item_id,
-        buyer_user_id=buyer_id,
-        seller_user_id=item.seller_user_id,
-        quantity_purchased=transaction_data.quantity,
-        purchase_price=item.price,
-        total_amount=total_amount
+    # Nothing fails on a second look: the item or balance changed in between
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="The item or your balance changed during the purchase, please try again"
     )
+
+
+def checkout(
+    db: Session,
+    checkout_data: CheckoutRequest,
+    buyer_id: int
+) -> CheckoutResponse:
+    """
+    Purchase every line of a cart in one database transaction.
     
-    # Update buyer's balance
-    buyer.cash_balance -= total_amount
-    
-    # Update seller's balance
-    seller.cash_balance += total_amount
-    
-    # Update item quantity or status
-    if transaction_data.quantity == item.quantity:
-        item.status = item_status.sold
-        item.quantity = 0
-    else:
-        item.quantity -= transaction_data.quantity
+    Items are locked in item ID order, then the buyer's users row, then the
+    buyer's pending credits. PURCHASE_SQL locks its one item, the buyer's row
+    and their credits in the same order, and sellers' rows are never locked
+    (they're credited through the balance_credits ledger), so a checkout and
+    a purchase never wait on each other's locks in opposite orders. The total
+    is checked against the buyer's balance (with their pending credits) once
+    and all transactions are written with one multi-row insert. Either every
+    line is bought or none is.
     
-    # Save all changes
-    db.add(transaction)
-    db.add(buyer)
-    db.add(seller)
-    db.add(item)
+    Args:
+        db: Database session
+        checkout_data: Cart lines; lines for the same item are added together
+        buyer_id: ID of the user making the purchase
+        
+    Returns:
+        The created transactions, their total and the buyer's new balance
+        
+    Raises:
+        HTTPException: If an item doesn't exist, isn't for sale, has too little
+                      quantity or belongs to the buyer, or the buyer can't pay
+                      for the whole cart
+    """
+    quantities: Dict[int, int] = {}
+    for line in checkout_data.items:
+        quantities[line.item_id] = quantities.get(line.item_id, 0) + line.quantity
+    
+    try:
+        items = {
+            item.item_id: item
+            for item in db.query(Item)
+            .filter(Item.item_id.in_(quantities))
+            .order_by(Item.item_id)
+            .with_for_update()
+        }
+        
+        for item_id, quantity in quantities.items():
+            item = items.get(item_id)
+            if not item:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Item with ID {item_id} not found"
+                )
+            if item.status != item_status.for_sale:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Item with ID {item_id} is not available for sale"
+                )
+            if quantity > item.quantity:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Requested quantity ({quantity}) of item {item_id} exceeds available quantity ({item.quantity})"
+                )
+            if buyer_id == item.seller_user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="You cannot purchase your own items"
+                )
+        
+        # populate_existing: get_current_user loaded the buyer into this session without a lock
+        buyer = (
+            db.query(User)
+            .filter(User.user_id == buyer_id)
+            .with_for_update(key_share=True)
+            .populate_existing()
+            .first()
+        )
+        if not buyer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Buyer with ID {buyer_id} not found"
+            )
+        # Money is summed as Decimal, as the NUMERIC columns hold it, so the check agrees with the database
+        buyer.cash_balance = as_money(buyer.cash_balance) + take_pending_credits(db, buyer_id)
+        
+        total_amount = sum(
+            (as_money(items[item_id].price) * quantity for item_id, quantity in quantities.items()),
+            Decimal(0)
+        )
+        if buyer.cash_balance < total_amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient funds. Required: {total_amount}, Available: {buyer.cash_balance}"
+            )
+        
+        rows = []
+        buyer.cash_balance -= total_amount
+        for item_id, quantity in quantities.items():
+            item = items[item_id]
+            amount = as_money(item.price) * quantity
+            
+            item.units_sold += quantity
+            item.quantity -= quantity
+            if item.quantity == 0:
+                item.status = item_status.sold
+            
+            rows.append({
+                "item_id": item_id,
+                "buyer_user_id": buyer_id,
+                "seller_user_id": item.seller_user_id,
+                "quantity_purchased": quantity,
+                "purchase_price": item.price,
+                "total_amount": amount,
+            })
+        
+        # Flushes the item and balance updates, then inserts every transaction in one statement
+        transactions = db.scalars(insert(Transaction).returning(Transaction), rows).all()
+        add_credits(db, ((t.seller_user_id, t.total_amount, t.transaction_id) for t in transactions))
+        response = CheckoutResponse(
+            transactions=[TransactionResponse.model_validate(t, from_attributes=True) for t in transactions],
+            total_amount=round(total_amount, 2),
+            cash_balance=round(buyer.cash_balance, 2)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    db.commit()
-    db.refresh(transaction)
+    # Reload the committed items in one query for the change listeners
+    changed = db.query(Item).filter(Item.item_id.in_(quantities)).all()
+    publish_item_change(*changed)
     
-    return transaction
+    return response
 
 
 def get_user_transactions(
@@ -241,6 +441,9 @@ def transfer_balance(
     """
     Transfer balance from one user to another.
     
+    The sender's row is locked and their pending credits taken before the
+    check; the receiver is credited through the balance_credits ledger.
+    
     Args:
         db: Database session
         transfer_data: Transfer data containing receiver_id and amount
@@ -254,7 +457,14 @@ def transfer_balance(
                       or trying to transfer to self
     """
     # Check if sender exists
-    sender = db.query(User).filter(User.user_id == sender_id).first()
+    # populate_existing: the session already holds the unlocked current user, refresh it under the lock
+    sender = (
+        db.query(User)
+        .filter(User.user_id == sender_id)
+        .with_for_update(key_share=True)
+        .populate_existing()
+        .first()
+    )
     
     if not sender:
         raise HTTPException(
@@ -271,8 +481,10 @@ def transfer_balance(
             detail=f"Receiver with ID {transfer_data.receiver_id} not found"
         )
     
-    # Check if sender has enough balance
-    if sender.cash_balance < transfer_data.amount:
+    # Check if sender has enough balance, counting credits not yet folded in
+    amount = as_money(transfer_data.amount)
+    sender.cash_balance = as_money(sender.cash_balance) + take_pending_credits(db, sender_id)
+    if sender.cash_balance < amount:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient funds. Required: {transfer_data.amount}, Available: {sender.cash_balance}"
@@ -286,14 +498,13 @@ def transfer_balance(
         )
     
     # Update sender's balance
-    sender.cash_balance -= transfer_data.amount
+    sender.cash_balance -= amount
     
-    # Update receiver's balance
-    receiver.cash_balance += transfer_data.amount
+    # Credit the receiver
+    add_credits(db, [(receiver.user_id, amount, None)])
     
     # Save changes
     db.add(sender)
-    db.add(receiver)
     db.commit()
     db.refresh(sender)
     
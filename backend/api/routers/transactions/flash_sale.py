@@ -0,0 +1,255 @@
+"""
+Flash-sale mode: purchases of hot items applied in micro-batches.
+
+When thousands of buyers hit one item at once, each purchase statement waits
+for the previous one's lock on the item row. For the items listed in
+FLASH_SALE_ITEM_IDS, purchases are instead queued in-process and a worker
+thread per item applies them in batches: everything queued while the previous
+batch ran becomes the next batch, up to FLASH_SALE_BATCH_SIZE purchases.
+
+A batch is one database transaction. It locks the item once, then the
+buyers' users rows in user ID order, then their pending credits: a single
+purchase takes the same item, users row, credits order, and the seller's row
+is never locked since sales credit it through the balance_credits ledger. The
+stock is allocated to the queued purchases first come, first served, every
+successful purchase is recorded with one multi-row insert and each waiting
+request then gets its own transaction, or the same error a single purchase
+would have raised.
+
+Every queued request holds a thread of AnyIO's worker pool, which runs the
+sync endpoints and has 40 threads by default, until its batch commits, so a
+batch can't grow past the threads left free. reserve_request_threads() adds
+FLASH_SALE_BATCH_SIZE threads to the pool when flash-sale items are configured.
+
+Queues are per process, so with several workers each one batches its own share
+of the requests; batches of different processes still serialize on the item row.
+The queue workers stop with the other background jobs, failing what's still queued.
+"""
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, List
+
+import anyio.to_thread
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+
+from api.background import background_jobs_stopped, start_worker
+from api.db import session_scope
+from api.events import publish_item_change
+from api.models.item.model import Item, item_status
+from api.models.transaction.model import Transaction
+from api.models.user.model import User
+from .balance_credits import add_credits, as_money, take_pending_credits_of
+
+logger = logging.getLogger("flash_sale")
+
+FLASH_SALE_ITEM_IDS = frozenset(
+    int(item_id) for item_id in os.getenv("FLASH_SALE_ITEM_IDS", "").split(",") if item_id.strip()
+)
+FLASH_SALE_BATCH_SIZE = int(os.getenv("FLASH_SALE_BATCH_SIZE", 200))
+
+# How often an idle queue worker checks whether background jobs were stopped
+_IDLE_POLL_SECONDS = 1.0
+
+
+class _QueuedPurchase:
+    """One buyer's request waiting in an item's queue"""
+
+    __slots__ = ("buyer_id", "quantity", "future")
+
+    def __init__(self, buyer_id: int, quantity: int):
+        self.buyer_id = buyer_id
+        self.quantity = quantity
+        self.future: Future = Future()
+
+
+class FlashSaleQueue:
+    """Purchase queue of one item, drained in batches by its own worker thread"""
+
+    def __init__(self, item_id: int, batch_size: int = FLASH_SALE_BATCH_SIZE):
+        self.item_id = item_id
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[_QueuedPurchase]" = queue.Queue()
+        self._thread = start_worker(f"flash-sale-{item_id}", self._run)
+
+    def submit(self, buyer_id: int, quantity: int) -> Future:
+        """Queue a purchase; the future resolves to its Transaction or raises its HTTPException"""
+        purchase = _QueuedPurchase(buyer_id, quantity)
+        self._queue.put(purchase)
+        if background_jobs_stopped():
+            # The worker may already have left its loop, so nothing would drain the queue
+            self._fail_queued()
+        return purchase.future
+
+    def _run(self) -> None:
+        while not background_jobs_stopped():
+            try:
+                batch = [self._queue.get(timeout=_IDLE_POLL_SECONDS)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception as e:
+                logger.error(f"Flash sale batch of {len(batch)} purchases of item {self.item_id} failed: {e}", exc_info=True)
+                for purchase in batch:
+                    if not purchase.future.done():
+                        purchase.future.set_exception(e)
+        self._fail_queued()
+
+    def _fail_queued(self) -> None:
+        """Fail every purchase still queued, once the worker has stopped"""
+        while True:
+            try:
+                purchase = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            purchase.future.set_exception(HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is shutting down, try the purchase again"
+            ))
+
+    def _apply(self, batch: List[_QueuedPurchase]) -> None:
+        """Apply a batch in one transaction, then resolve every purchase in it"""
+        with session_scope() as db:
+            item = db.query(Item).filter(Item.item_id == self.item_id).with_for_update().first()
+            if not item:
+                for purchase in batch:
+                    purchase.future.set_exception(HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Item with ID {self.item_id} not found"
+                    ))
+                return
+
+            buyer_ids = sorted({purchase.buyer_id for purchase in batch} - {item.seller_user_id})
+            buyers: Dict[int, User] = {
+                user.user_id: user
+                for user in db.query(User)
+                .filter(User.user_id.in_(buyer_ids))
+                .order_by(User.user_id)
+                .with_for_update(key_share=True)
+            }
+            # Money is handled as Decimal, as the NUMERIC columns hold it, so the checks agree with the database
+            for buyer in buyers.values():
+                buyer.cash_balance = as_money(buyer.cash_balance)
+            for user_id, amount in take_pending_credits_of(db, buyers).items():
+                buyers[user_id].cash_balance += amount
+
+            accepted: List[_QueuedPurchase] = []
+            errors: Dict[_QueuedPurchase, HTTPException] = {}
+            for purchase in batch:
+                error = self._allocate(item, buyers.get(purchase.buyer_id), purchase)
+                if error is None:
+                    accepted.append(purchase)
+                else:
+                    errors[purchase] = error
+
+            transactions: List[Transaction] = []
+            if accepted:
+                price = as_money(item.price)
+                rows = [
+                    {
+                        "item_id": item.item_id,
+                        "buyer_user_id": purchase.buyer_id,
+                        "seller_user_id": item.seller_user_id,
+                        "quantity_purchased": purchase.quantity,
+                        "purchase_price": price,
+                        "total_amount": price * purchase.quantity,
+                    }
+                    for purchase in accepted
+                ]
+                # Flushes the item and balance updates, then inserts every transaction in one statement
+                recorded = db.execute(
+                    insert(Transaction).returning(
+                        Transaction.transaction_id,
+                        Transaction.transaction_time,
+                        sort_by_parameter_order=True
+                    ),
+                    rows
+                ).all()
+                transactions = [
+                    Transaction(**row, transaction_id=transaction_id, transaction_time=transaction_time)
+                    for row, (transaction_id, transaction_time) in zip(rows, recorded)
+                ]
+                add_credits(db, ((t.seller_user_id, t.total_amount, t.transaction_id) for t in transactions))
+            db.commit()
+
+            if accepted:
+                publish_item_change(item)
+
+        for purchase, transaction in zip(accepted, transactions):
+            purchase.future.set_result(transaction)
+        for purchase, error in errors.items():
+            purchase.future.set_exception(error)
+        logger.debug(f"Flash sale batch for item {self.item_id}: {len(accepted)} bought, {len(errors)} refused")
+
+    def _allocate(self, item: Item, buyer: User, purchase: _QueuedPurchase):
+        """Take the purchase's stock and payment in memory, or return why it can't be made"""
+        if item.status != item_status.for_sale:
+            return HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Item with ID {item.item_id} is not available for sale"
+            )
+        if purchase.quantity > item.quantity:
+            return HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Requested quantity ({purchase.quantity}) exceeds available quantity ({item.quantity})"
+            )
+        if purchase.buyer_id == item.seller_user_id:
+            return HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You cannot purchase your own items"
+            )
+        if buyer is None:
+            return HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Buyer with ID {purchase.buyer_id} not found"
+            )
+        total_amount = as_money(item.price) * purchase.quantity
+        if buyer.cash_balance < total_amount:
+            return HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient funds. Required: {total_amount}, Available: {buyer.cash_balance}"
+            )
+
+        buyer.cash_balance -= total_amount
+        item.units_sold += purchase.quantity
+        item.quantity -= purchase.quantity
+        if item.quantity == 0:
+            item.status = item_status.sold
+        return None
+
+
+_queues: Dict[int, FlashSaleQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def is_flash_sale_item(item_id: int) -> bool:
+    return item_id in FLASH_SALE_ITEM_IDS
+
+
+def reserve_request_threads() -> None:
+    """Grow AnyIO's default thread pool by FLASH_SALE_BATCH_SIZE if there are flash-sale items; call from the event loop"""
+    if FLASH_SALE_ITEM_IDS:
+        anyio.to_thread.current_default_thread_limiter().total_tokens += FLASH_SALE_BATCH_SIZE
+
+
+def flash_sale_purchase(item_id: int, buyer_id: int, quantity: int) -> Transaction:
+    """
+    Buy through the item's flash-sale queue, blocking until the batch holding the purchase commits.
+
+    Raises:
+        HTTPException: The same errors as a single purchase
+    """
+    with _queues_lock:
+        sale = _queues.get(item_id)
+        if sale is None:
+            sale = _queues[item_id] = FlashSaleQueue(item_id)
+    return sale.submit(buyer_id, quantity).result()
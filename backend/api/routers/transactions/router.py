@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from typing import Optional
 from sqlalchemy.orm import Session
 import logging
 
 from api.db import get_db
 from api.dependencies import get_current_user
+from api.idempotency import run_idempotent
 from api.models.user.model import User
 from .schemas import (
     TransactionCreate, 
@@ -11,7 +13,9 @@ from .schemas import (
     TransactionListResponse,
     TransactionDetailedResponse,
     BalanceTransfer,
-    BalanceResponse
+    BalanceResponse,
+    CheckoutRequest,
+    CheckoutResponse
 )
 from . import crud
 
@@ -32,6 +36,7 @@ logger = logging.getLogger(__name__)
 )
 def purchase_item(
     transaction: TransactionCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Unique key that makes retries of this purchase safe"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -40,19 +45,68 @@ def purchase_item(
     
     - **item_id**: ID of the item to purchase
     - **quantity**: Number of units to purchase (default: 1)
+    
+    A retry with the same **Idempotency-Key** header returns the original response instead of buying again.
     """
     try:
-        result = crud.create_transaction(
-            db=db, 
-            transaction_data=transaction, 
-            buyer_id=current_user.user_id
+        return run_idempotent(
+            db,
+            idempotency_key,
+            current_user.user_id,
+            "purchase",
+            transaction,
+            lambda: crud.create_transaction(
+                db=db, 
+                transaction_data=transaction, 
+                buyer_id=current_user.user_id
+            ),
+            TransactionResponse,
+            status.HTTP_201_CREATED
         )
-        return result
     except Exception as e:
         logger.error(f"Error during purchase: {str(e)}")
         raise
 
 
+@router.post(
+    "/checkout",
+    response_model=CheckoutResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Purchase every item in a cart"
+)
+def checkout_cart(
+    checkout_request: CheckoutRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Unique key that makes retries of this checkout safe"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Purchase several items at once; either every line is bought or none is.
+    
+    - **items**: Cart lines, each with an **item_id** and a **quantity** (default: 1)
+    
+    A retry with the same **Idempotency-Key** header returns the original response instead of buying again.
+    """
+    try:
+        return run_idempotent(
+            db,
+            idempotency_key,
+            current_user.user_id,
+            "checkout",
+            checkout_request,
+            lambda: crud.checkout(
+                db=db,
+                checkout_data=checkout_request,
+                buyer_id=current_user.user_id
+            ),
+            CheckoutResponse,
+            status.HTTP_201_CREATED
+        )
+    except Exception as e:
+        logger.error(f"Error during checkout: {str(e)}")
+        raise
+
+
 @router.get(
     "/",
     response_model=TransactionListResponse,
@@ -152,6 +206,7 @@ def get_transaction(
 )
 def transfer_funds(
     transfer_data: BalanceTransfer,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Unique key that makes retries of this transfer safe"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -160,14 +215,27 @@ def transfer_funds(
     
     - **receiver_id**: ID of the user receiving the funds
     - **amount**: Amount to transfer (must be positive)
+    
+    A retry with the same **Idempotency-Key** header returns the original response instead of transferring again.
     """
-    result = crud.transfer_balance(
-        db=db,
-        transfer_data=transfer_data,
-        sender_id=current_user.user_id
-    )
-    return BalanceResponse(
-        user_id=current_user.user_id,
-        cash_balance=result["cash_balance"],
-        message=result["message"]
+    def transfer():
+        result = crud.transfer_balance(
+            db=db,
+            transfer_data=transfer_data,
+            sender_id=current_user.user_id
+        )
+        return BalanceResponse(
+            user_id=current_user.user_id,
+            cash_balance=result["cash_balance"],
+            message=result["message"]
+        )
+    
+    return run_idempotent(
+        db,
+        idempotency_key,
+        current_user.user_id,
+        "transfer",
+        transfer_data,
+        transfer,
+        BalanceResponse
     )
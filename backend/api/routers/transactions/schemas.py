@@ -38,6 +38,18 @@ class TransactionResponse(BaseModel):
         from_attributes = True
 
 
+class CheckoutRequest(BaseModel):
+    """Request schema for buying several items at once"""
+    items: List[TransactionCreate] = Field(min_length=1, max_length=100, description="Cart lines to purchase")
+
+
+class CheckoutResponse(BaseModel):
+    """Response schema for a completed checkout"""
+    transactions: List[TransactionResponse]
+    total_amount: float
+    cash_balance: float
+
+
 class TransactionDetailedResponse(TransactionResponse):
     """Enhanced response schema with detailed information about users and item"""
     buyer: Optional['UserInfo'] = None
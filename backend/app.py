@@ -2,8 +2,10 @@ from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from jose import JWTError, jwt
 import os
+import logging
 from dotenv import load_dotenv
 import sys
 
@@ -16,7 +18,11 @@ dotenv_path = os.path.join(ROOT_DIR, '.env')
 load_dotenv(dotenv_path)
 
 # Change from relative imports to absolute imports
-from api.db import Base, engine, get_db
+from api.db import Base, engine, get_db, session_scope
+from api.background import run_periodically, stop_background_jobs
+from api.idempotency import purge_expired_idempotency_keys, IDEMPOTENCY_KEY_PURGE_SECONDS
+from api.routers.transactions.balance_credits import compact_balance_credits, BALANCE_CREDIT_COMPACT_SECONDS
+from api.routers.transactions.flash_sale import reserve_request_threads
 from api.dependencies import get_current_user
 from api.models.user.model import User
 # Import routers
@@ -27,9 +33,58 @@ from api.routers.search.router import search_router
 from api.routers.items.router import router as items_router
 from api.routers.dashboard.router import router as dashboard_router
 from api.routers.reporting.router import router as reporting_router
+from api.routers.search.suggest import rebuild_suggest_index, SUGGEST_INDEX_REFRESH_SECONDS
+from api.routers.search.fuzzy import rebuild_fuzzy_index, FUZZY_INDEX_REFRESH_SECONDS
+from api.routers.items.featured import rebuild_featured_items, FEATURED_ITEMS_REFRESH_SECONDS
+from api.routers.items.category_counts import rebuild_category_counts, CATEGORY_COUNTS_REFRESH_SECONDS
 # Create all tables at startup
 Base.metadata.create_all(bind=engine)
 
+logger = logging.getLogger("app")
+
+def refresh_suggest_index():
+    with session_scope() as db:
+        rebuild_suggest_index(db)
+
+def refresh_fuzzy_index():
+    with session_scope() as db:
+        rebuild_fuzzy_index(db)
+
+def refresh_featured_items():
+    with session_scope() as db:
+        rebuild_featured_items(db)
+
+def refresh_category_counts():
+    with session_scope() as db:
+        rebuild_category_counts(db)
+
+def fold_balance_credits():
+    with session_scope() as db:
+        compact_balance_credits(db)
+
+# In-memory indexes: (name, refresh interval, loader)
+in_memory_indexes = [
+    ("suggest-index", SUGGEST_INDEX_REFRESH_SECONDS, refresh_suggest_index),
+    ("fuzzy-index", FUZZY_INDEX_REFRESH_SECONDS, refresh_fuzzy_index),
+    ("featured-items", FEATURED_ITEMS_REFRESH_SECONDS, refresh_featured_items),
+    ("category-counts", CATEGORY_COUNTS_REFRESH_SECONDS, refresh_category_counts),
+]
+
+# Load in-memory indexes and start their background refreshes
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for name, interval, refresh in in_memory_indexes:
+        try:
+            refresh()
+        except Exception as e:
+            logger.error(f"Initial {name} load failed: {e}")
+        run_periodically(name, interval, refresh)
+    run_periodically("idempotency-key-purge", IDEMPOTENCY_KEY_PURGE_SECONDS, purge_expired_idempotency_keys)
+    run_periodically("balance-credit-compactor", BALANCE_CREDIT_COMPACT_SECONDS, fold_balance_credits)
+    reserve_request_threads()
+    yield
+    stop_background_jobs()
+
 # API metadata
 version = "0.0"
 app = FastAPI(
@@ -38,7 +93,8 @@ app = FastAPI(
     description="API for the Market Place application",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS setup
@@ -48,6 +104,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 
 # Create API prefix
@@ -252,6 +252,14 @@ async def seed_transactions(count=transaction_seed_count, users=None, items=None
             # Use simple spinner animation - we'll try more times than needed to ensure we get enough transactions
             await show_spinner("transactions", count, create_transaction)
             
+            # Keep the items' sales totals in step with the seeded transactions
+            await session.flush()
+            await session.execute(text(
+                "UPDATE items SET units_sold = sold.total "
+                "FROM (SELECT item_id, SUM(quantity_purchased) AS total FROM transactions GROUP BY item_id) AS sold "
+                "WHERE items.item_id = sold.item_id"
+            ))
+            
             return transactions
 
 async def seed_user_tokens(users=None):
@@ -77,6 +77,81 @@ CREATE INDEX IF NOT EXISTS idx_user_tokens_user_id ON user_tokens (user_id);
 CREATE INDEX IF NOT EXISTS idx_user_tokens_token ON user_tokens (token);
 CREATE INDEX IF NOT EXISTS idx_user_tokens_expires_at ON user_tokens (expires_at);
 
+-- Item search: generated tsvector for ranked full-text matching, trigram indexes
+-- for substring (ILIKE '%term%') matching and a prefix index for short terms
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(category, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_items_search_vector ON items USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_items_name_trgm ON items USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_items_category_trgm ON items USING GIN (category gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_items_name_prefix ON items (lower(name) text_pattern_ops);
+
+-- Item search orderings: total units sold per item (backfilled from transactions)
+-- and one composite index per sort, so each is an index scan with LIMIT
+ALTER TABLE items ADD COLUMN IF NOT EXISTS units_sold INT NOT NULL DEFAULT 0;
+
+UPDATE items SET units_sold = sold.total
+FROM (SELECT item_id, SUM(quantity_purchased) AS total FROM transactions GROUP BY item_id) AS sold
+WHERE items.item_id = sold.item_id AND items.units_sold <> sold.total;
+
+CREATE INDEX IF NOT EXISTS idx_items_status_price ON items (status, price, item_id);
+CREATE INDEX IF NOT EXISTS idx_items_status_listed_at ON items (status, listed_at DESC, item_id DESC);
+CREATE INDEX IF NOT EXISTS idx_items_status_units_sold ON items (status, units_sold DESC, item_id DESC);
+
+-- Catalog listings (all, recent, by category): newest first over what's buyable
+CREATE INDEX IF NOT EXISTS idx_items_for_sale_listed_at ON items (listed_at DESC, item_id DESC)
+    WHERE status = 'for_sale' AND quantity > 0;
+CREATE INDEX IF NOT EXISTS idx_items_for_sale_category_listed_at ON items (category, listed_at DESC, item_id DESC)
+    WHERE status = 'for_sale' AND quantity > 0;
+
+-- Catalog version for conditional GETs: the latest write to any item, plus a
+-- counter the application bumps after each item write commits. updated_at is
+-- the writing transaction's start time, so a slow write can commit with an
+-- older value than one already read; the counter still moves when it lands.
+CREATE INDEX IF NOT EXISTS idx_items_updated_at ON items (updated_at);
+CREATE SEQUENCE IF NOT EXISTS catalog_version_seq;
+
+-- Deposit search: newest-first pages per user and across all users, both walking
+-- (deposit_time, deposit_id) so time-range filters and cursors stay index range scans
+CREATE INDEX IF NOT EXISTS idx_deposits_user_time ON deposits (user_id, deposit_time DESC, deposit_id DESC);
+CREATE INDEX IF NOT EXISTS idx_deposits_time ON deposits (deposit_time DESC, deposit_id DESC);
+
+-- Idempotency-Key store for money-moving POSTs: one row per (user, key), reserved
+-- before the write runs and holding the response once it has, until expires_at
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code SMALLINT,
+    response_body JSONB,
+    -- End of the running request's lease; a retry may take the key over after it
+    locked_until TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_id, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- Seller and transfer credits, appended without touching the receiving users row
+-- and folded into users.cash_balance by a background compactor; a balance is
+-- cash_balance plus the user's rows here
+CREATE TABLE IF NOT EXISTS balance_credits (
+    credit_id BIGSERIAL PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    amount NUMERIC(12, 2) NOT NULL CHECK (amount > 0),
+    transaction_id INT REFERENCES transactions(transaction_id),
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_balance_credits_user_id ON balance_credits (user_id);
+
 -- Function for updating the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
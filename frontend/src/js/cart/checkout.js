@@ -6,7 +6,7 @@
 import { cartManager } from "../shared/cart-manager.js";
 import { authService } from "../core/api/index.js";
 import API_ENDPOINTS from "../core/api/endpoints.js";
-import { getWalletBalance, createTransaction } from "../core/api/services/transactionsService.js";
+import { getWalletBalance, checkoutCart } from "../core/api/services/transactionsService.js";
 
 /**
  * Initialize checkout process when the checkout button is clicked
@@ -162,31 +162,18 @@ async function proceedWithCheckout() {
           throw new Error("No valid items found in cart");
         }
         
-        // Process each item in the cart as a separate transaction
-        const transactionPromises = cartItems.map(item => {
-          // Create transaction data structure expected by API
-          const transactionData = {
-            item_id: item.item_id,
-            quantity: item.quantity
-          };
-          
-          console.log(`Creating transaction for item_id: ${item.item_id}, quantity: ${item.quantity}`);
-          return createTransaction(transactionData);
-        });
-        
-        // Process all transactions in parallel
-        const transactionResults = await Promise.all(transactionPromises);
-        console.log("Transactions processed successfully:", transactionResults);
+        // Buy every item in the cart with one all-or-nothing checkout
+        const checkoutResult = await checkoutCart(cartItems);
+        console.log("Checkout processed successfully:", checkoutResult);
         
-        // Get the latest transaction to determine the new balance
-        const lastTransaction = transactionResults[transactionResults.length - 1];
-          // Generate order ID from transaction IDs or fallback to timestamp if not available
-        const orderID = transactionResults.some(tr => tr.transaction_id || tr.id) 
-          ? `ORDER-${transactionResults.map(tr => tr.transaction_id || tr.id || 'UNKNOWN').join('-')}`
+        const transactionResults = checkoutResult.transactions || [];
+        // Generate order ID from transaction IDs or fallback to timestamp if not available
+        const orderID = transactionResults.length
+          ? `ORDER-${transactionResults.map(tr => tr.transaction_id).join('-')}`
           : generateOrderNumber();
         
-        // Get updated balance - we need to query it as the backend doesn't return it
-        const updatedBalance = await getUserBalance();
+        // The checkout response carries the new balance
+        const updatedBalance = checkoutResult.cash_balance;
         
         // Clear the cart after successful transaction
         cartManager.clearCart();
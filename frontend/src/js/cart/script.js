@@ -131,11 +131,16 @@ async function loadCart() {
   let totalPrice = 0;
   let totalItems = 0;
 
+  // Details of every cart item, fetched in batch requests
+  const itemsById = await fetchItemsDetails(cart.map((cartItem) => cartItem.id));
+
   // Process each cart item
   for (const cartItem of cart) {
     try {
-      console.log("Fetching details for item ID:", cartItem.id);
-      const itemData = await fetchItemDetails(cartItem.id);
+      // Items the batch lookup couldn't return fall back to a single lookup
+      const itemData =
+        itemsById.get(String(cartItem.id)) ||
+        (await fetchItemDetails(cartItem.id));
 
       if (!itemData) {
         console.warn(`No data returned for item ID: ${cartItem.id}`);
@@ -295,6 +300,48 @@ async function loadCart() {
   initQuantityControls();
 }
 
+/**
+ * Fetch the details of several items through the batch endpoint
+ * @param {Array<number|string>} itemIds - IDs of the items to fetch
+ * @returns {Promise<Map<string, Object>>} - Item data keyed by item ID, without items that weren't found
+ */
+async function fetchItemsDetails(itemIds) {
+  const itemsById = new Map();
+  const uniqueIds = [...new Set(itemIds.map(String))];
+
+  // The batch endpoint takes at most 100 IDs per request
+  for (let start = 0; start < uniqueIds.length; start += 100) {
+    const ids = uniqueIds.slice(start, start + 100);
+    try {
+      const response = await fetch(
+        `http://localhost:8000/api/v0/search/items/batch?ids=${ids.map(encodeURIComponent).join(",")}`,
+        {
+          method: "GET",
+          mode: "cors",
+          headers: { Accept: "application/json" },
+          // Ensure we're not caching results
+          cache: "no-store",
+        }
+      );
+      if (!response.ok) {
+        console.error(`Batch item lookup failed (${response.status}): ${response.statusText}`);
+        continue;
+      }
+
+      const data = await response.json();
+      data.results.forEach((item, index) => {
+        if (item) {
+          itemsById.set(ids[index], item);
+        }
+      });
+    } catch (error) {
+      console.error("Error fetching item details in batch:", error);
+    }
+  }
+
+  return itemsById;
+}
+
 /**
  * Fetch item details from the API using the specified endpoint
  * @param {number|string} itemId - The ID of the item to fetch
@@ -55,6 +55,7 @@ const API_ENDPOINTS = {
     },
     transactions: {
         purchase: '/api/v0/transactions/purchase',
+        checkout: '/api/v0/transactions/checkout',
         list: '/api/v0/transactions/',
         purchases: '/api/v0/transactions/purchases',
         details: (id) => `/api/v0/transactions/${id}`,
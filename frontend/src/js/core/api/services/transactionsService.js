@@ -80,6 +80,29 @@ const createTransaction = async (transactionData) => {
     }
 };
 
+/**
+ * Purchase every line of a cart in one request; either all lines are bought or none are
+ * @param {Array<object>} items - Cart lines with item_id and quantity
+ * @returns {Promise<object>} Created transactions, their total and the new cash balance
+ */
+const checkoutCart = async (items) => {
+    if (!items || !items.length) {
+        throw new Error('At least one item is required for checkout');
+    }
+    
+    const lines = items.map(item => ({
+        item_id: parseInt(item.item_id, 10),
+        quantity: parseInt(item.quantity, 10) || 1
+    }));
+    
+    try {
+        return await apiClient.post(API_ENDPOINTS.transactions.checkout, { items: lines });
+    } catch (error) {
+        console.error('Checkout error:', error);
+        throw error;
+    }
+};
+
 /**
  * Make a deposit to user's wallet
  * @param {number} amount - Amount to deposit
@@ -141,6 +164,7 @@ export {
     getTransactions,
     getTransactionById,
     createTransaction,
+    checkoutCart,
     makeDeposit,
     getWalletBalance,
     transferFunds
@@ -12,7 +12,7 @@ const API_BASE_URL = '/api/v0';
  */
 export async function fetchProductById(productId) {
   try {
-    const response = await fetch(`${API_BASE_URL}/search/items/search?item_id=${productId}`);
+    const response = await fetch(`${API_BASE_URL}/search/items/${productId}`);
     
     if (!response.ok) {
       if (response.status === 404) {
@@ -21,8 +21,7 @@ export async function fetchProductById(productId) {
       throw new Error(`Error fetching product: ${response.status}`);
     }
     
-    const data = await response.json();
-    return data[0]; // The API returns an array with one item when using item_id
+    return await response.json();
   } catch (error) {
     console.error('Error in fetchProductById:', error);
     throw error;
@@ -50,7 +49,7 @@ export async function fetchRelatedProducts(currentProductId, category, limit = 3
     const data = await response.json();
     
     // Filter out current product and limit results
-    return data
+    return data.results
       .filter(product => product.item_id !== parseInt(currentProductId))
       .slice(0, limit);
   } catch (error) {
@@ -80,7 +79,7 @@ export async function fetchFeaturedProducts(currentProductId, limit = 3) {
     const data = await response.json();
     
     // Filter out current product, shuffle the array for variety, and limit results
-    return data
+    return data.results
       .filter(product => product.item_id !== parseInt(currentProductId))
       .sort(() => 0.5 - Math.random()) // Simple shuffle
       .slice(0, limit);
@@ -99,7 +98,7 @@ export async function fetchFeaturedProducts(currentProductId, limit = 3) {
  * @param {number} [searchParams.max_price] - Maximum price
  * @param {string} [searchParams.status='for_sale'] - Product status
  * @param {number} [searchParams.seller_id] - Filter by seller
- * @returns {Promise<Array>} - Search results
+ * @returns {Promise<Array>} - First page of search results
  */
 export async function searchProducts(searchParams) {
   try {
@@ -125,7 +124,8 @@ export async function searchProducts(searchParams) {
       throw new Error(`Error searching products: ${response.status}`);
     }
     
-    return await response.json();
+    const data = await response.json();
+    return data.results;
   } catch (error) {
     console.error('Error in searchProducts:', error);
     throw error;
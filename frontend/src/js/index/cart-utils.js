@@ -23,16 +23,12 @@ export async function addToCart(itemId, quantity = 1) {
         let productImage = null;
         let productPrice = 0;
         
-        try {
-            const response = await fetch(`http://localhost:8000/api/v0/items/${itemId}`);
-            if (response.ok) {
-                const productDetails = await response.json();
-                productName = productDetails.name || 'Product';
-                productImage = productDetails.image_url;
-                productPrice = productDetails.price || 0;
-            }
-        } catch (error) {
-            console.error('Error fetching product details for notification', error);
+        // Goes through the cart manager's batch lookup and cache, so it's shared with the cart
+        const productDetails = await cartManager.getProductDetails(itemId);
+        if (productDetails) {
+            productName = productDetails.name || 'Product';
+            productImage = productDetails.image_url;
+            productPrice = productDetails.price || 0;
         }
         
         // Create product object for cart manager
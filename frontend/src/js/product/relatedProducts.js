@@ -154,7 +154,7 @@ async function fetchRelatedProductsFromAPI(productId, category, limit = 3) {
     const allData = await response.json();
     
     // Filter out the current product and limit the results
-    const filteredData = allData
+    const filteredData = allData.results
       .filter(item => item.item_id.toString() !== productId.toString())
       .slice(0, limit);
     
@@ -145,7 +145,7 @@ function renderViewedProducts(products) {
 async function fetchRecommendedProductsFromAPI(productId, limit = 3) {
   try {
     // Use featured or popular products endpoint, excluding current product
-    const response = await fetch(`${API_BASE_URL}/api/v0/items/featured?limit=${limit}&exclude_id=${productId}`);
+    const response = await fetch(`${API_BASE_URL}/api/v0/items/featured?limit=${limit}&exclude_ids=${productId}`);
     
     if (!response.ok) {
       throw new Error(`API error: ${response.status}`);
@@ -157,7 +157,7 @@ async function fetchRecommendedProductsFromAPI(productId, limit = 3) {
     console.error('Error fetching recommended products from API:', error);
     // If featured endpoint fails, try recent products
     try {
-      const response = await fetch(`${API_BASE_URL}/api/v0/items/recent?limit=${limit}&exclude_id=${productId}`);
+      const response = await fetch(`${API_BASE_URL}/api/v0/items/recent?limit=${limit}&exclude_ids=${productId}`);
       if (!response.ok) {
         throw new Error(`API error: ${response.status}`);
       }
@@ -13,7 +13,10 @@ class ProductLoader {
     this.searchEndpoint = "search/items/search";
     this.itemsEndpoint = "items/";
     this.products = [];
-    this.allProducts = []; // Store all fetched products for pagination
+    this.allProducts = []; // Recent items, paginated on the client
+    // Search results are paged by the server: pageCursors[i] fetches page i + 1
+    this.pageCursors = [null];
+    this.searchParams = null;
     this.categories = [];
     this.currentFilters = {
       category: null,
@@ -334,8 +337,12 @@ class ProductLoader {
         // Reset to first page when changing items per page
         this.pagination.currentPage = 1;
 
-        // Apply pagination
-        this.applyPagination();
+        // Search pages are sized by the server, so start over with the new size
+        if (this.currentFilters.featured) {
+          this.applyPagination();
+        } else {
+          this.fetchProducts();
+        }
       });
     }
   }
@@ -352,8 +359,7 @@ class ProductLoader {
         // Previous page button
         if (button.title === "Previous page") {
           if (this.pagination.currentPage > 1) {
-            this.pagination.currentPage--;
-            this.applyPagination();
+            this.goToPage(this.pagination.currentPage - 1);
           }
           return;
         }
@@ -361,8 +367,7 @@ class ProductLoader {
         // Next page button
         if (button.title === "Next page") {
           if (this.pagination.currentPage < this.pagination.totalPages) {
-            this.pagination.currentPage++;
-            this.applyPagination();
+            this.goToPage(this.pagination.currentPage + 1);
           }
           return;
         }
@@ -370,13 +375,28 @@ class ProductLoader {
         // Numeric page buttons
         const pageNum = parseInt(button.textContent);
         if (!isNaN(pageNum)) {
-          this.pagination.currentPage = pageNum;
-          this.applyPagination();
+          this.goToPage(pageNum);
         }
       });
     }
   }
 
+  /**
+   * Show a page: recent items are sliced on the client, search results fetched from the server
+   * @param {number} page - Page number, starting at 1
+   */
+  goToPage(page) {
+    if (this.currentFilters.featured) {
+      this.pagination.currentPage = page;
+      this.applyPagination();
+    } else {
+      this.loadSearchPage(page).catch((error) => {
+        console.error("Error fetching products:", error);
+        this.showError(`Failed to load products: ${error.message}`);
+      });
+    }
+  }
+
   /**
    * Apply pagination to products
    */
@@ -651,24 +671,14 @@ class ProductLoader {
       if (this.currentFilters.seller_id) params.set('seller_id', this.currentFilters.seller_id);
       if (this.currentFilters.min_quantity) params.set('min_quantity', this.currentFilters.min_quantity);
 
-      // Use the search endpoint for all product fetching
-      const url = `${this.apiBaseUrl}${this.searchEndpoint}?${params.toString()}`;
-      console.log("Fetching products with filters:", url);
+      // The search endpoint returns one page of {results, next_cursor} at a
+      // time; only the first is fetched now, later ones when they're opened
+      params.set('limit', this.pagination.itemsPerPage);
+      this.searchParams = params;
+      this.currentFilters.featured = false;
+      this.pageCursors = [null];
 
-      const response = await fetch(url);
-
-      if (!response.ok) {
-        throw new Error(`Failed to fetch products: ${response.status}`);
-      }
-
-      const data = await response.json();
-      console.log("API response:", data);
-
-      // Store all products for pagination
-      this.allProducts = Array.isArray(data) ? data : [];
-
-      // Apply pagination
-      this.applyPagination();
+      await this.loadSearchPage(1);
       
       // Always update the URL with current filters
       this.updateURLWithFilters();
@@ -681,6 +691,42 @@ class ProductLoader {
     }
   }
 
+  /**
+   * Fetch and render one page of search results
+   * @param {number} page - Page number, starting at 1; every page before it has been loaded
+   */
+  async loadSearchPage(page) {
+    const params = new URLSearchParams(this.searchParams);
+    const cursor = this.pageCursors[page - 1];
+    if (cursor) params.set('cursor', cursor);
+
+    const url = `${this.apiBaseUrl}${this.searchEndpoint}?${params.toString()}`;
+    console.log("Fetching products with filters:", url);
+
+    this.showLoading();
+    const response = await fetch(url);
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch products: ${response.status}`);
+    }
+
+    const data = await response.json();
+    console.log("API response:", data);
+
+    this.products = data.results || [];
+    // Pages up to this one and, if the server has more, the next one are known
+    this.pageCursors.length = page;
+    if (data.next_cursor) {
+      this.pageCursors.push(data.next_cursor);
+    }
+    this.pagination.currentPage = page;
+    this.pagination.totalPages = this.pageCursors.length;
+
+    this.renderProducts();
+    this.updatePaginationUI();
+    this.updateProductCountDisplay(this.currentFilters);
+  }
+
   /**
    * Update the product count display in the page header
    * @param {Object} filters - Current filters
@@ -693,25 +739,32 @@ class ProductLoader {
 
     let displayText = "";
 
+    // Search results are only known up to the current page; "+" marks that more follow
+    const start =
+      (this.pagination.currentPage - 1) * this.pagination.itemsPerPage + 1;
+    let end;
+    let count;
+    if (this.currentFilters.featured) {
+      end = Math.min(start + this.pagination.itemsPerPage - 1, this.allProducts.length);
+      count = `${this.allProducts.length}`;
+    } else {
+      end = start + this.products.length - 1;
+      const hasMore = this.pagination.currentPage < this.pagination.totalPages;
+      count = hasMore ? `${end}+` : `${Math.max(end, 0)}`;
+    }
+
     if (filters.category) {
-      displayText = `${this.allProducts.length} items in ${filters.category}`;
+      displayText = `${count} items in ${filters.category}`;
     } else if (filters.name) {
-      displayText = `${this.allProducts.length} results for "${filters.name}"`;
+      displayText = `${count} results for "${filters.name}"`;
     } else if (this.currentFilters.featured) {
-      displayText = `${this.allProducts.length} recently listed items`;
+      displayText = `${count} recently listed items`;
     } else {
-      displayText = `${this.allProducts.length} items in all categories`;
+      displayText = `${count} items in all categories`;
     }
 
     // Add pagination info
-    const start =
-      (this.pagination.currentPage - 1) * this.pagination.itemsPerPage + 1;
-    const end = Math.min(
-      start + this.pagination.itemsPerPage - 1,
-      this.allProducts.length
-    );
-
-    if (this.allProducts.length > 0) {
+    if (end >= start) {
       displayText += ` (showing ${start}-${end})`;
     }
 
@@ -164,6 +164,9 @@ class CartManager {
       const cart = this.getCart();
       const completeCart = [];
       
+      // Fetch details for every uncached item in batch requests
+      await this.prefetchProductDetails(cart.map(item => item.id));
+      
       // For each item in cart, fetch its details 
       for (const item of cart) {
         const productDetails = await this.getProductDetails(item.id);
@@ -193,6 +196,35 @@ class CartManager {
     }
   }
 
+  /**
+   * Load details for many products into the cache with batch requests
+   * @param {Array<string|number>} productIds - Product IDs
+   * @returns {Promise<void>}
+   */
+  async prefetchProductDetails(productIds) {
+    const uncachedIds = [...new Set(productIds)].filter(id => !this.productCache.has(id));
+    
+    // The batch endpoint takes at most 100 IDs per request
+    for (let start = 0; start < uncachedIds.length; start += 100) {
+      const ids = uncachedIds.slice(start, start + 100);
+      try {
+        const response = await fetch(`http://localhost:8000/api/v0/search/items/batch?ids=${ids.map(encodeURIComponent).join(',')}`);
+        if (!response.ok) {
+          continue;
+        }
+        
+        const data = await response.json();
+        data.results.forEach((product, index) => {
+          if (product) {
+            this.productCache.set(ids[index], product);
+          }
+        });
+      } catch (error) {
+        console.error('Error prefetching product details:', error);
+      }
+    }
+  }
+
   /**
    * Get product details from server or cache
    * @param {string|number} productId - Product ID
@@ -205,33 +237,9 @@ class CartManager {
         return this.productCache.get(productId);
       }
       
-      // Fetch from server
-      const response = await fetch(`http://localhost:8000/api/v0/items/${productId}`);
-      if (!response.ok) {
-        // If specific product endpoint fails, try searching for it
-        const searchResponse = await fetch(`http://localhost:8000/api/v0/products/?skip=0&limit=100`);
-        if (searchResponse.ok) {
-          const searchData = await searchResponse.json();
-          const product = searchData.items?.find(item => 
-            item.id === productId || 
-            item.name === productId ||
-            item.name.toLowerCase() === productId.toString().toLowerCase()
-          );
-          
-          if (product) {
-            this.productCache.set(productId, product);
-            return product;
-          }
-        }
-        return null;
-      }
-      
-      const product = await response.json();
-      
-      // Cache the result
-      this.productCache.set(productId, product);
-      
-      return product;
+      // Fetch from server through the batch endpoint, which caches the result
+      await this.prefetchProductDetails([productId]);
+      return this.productCache.get(productId) || null;
     } catch (error) {
       console.error('Error fetching product details:', error);
       return null;
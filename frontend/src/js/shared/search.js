@@ -1,4 +1,4 @@
-// Search functionality using /v0/search/items/search API
+// Search-as-you-type using the /v0/search/items/suggest API
 document.addEventListener("DOMContentLoaded", function () {
   const searchForm = document.querySelector("#search-form");
   const searchInput = document.querySelector("#search-form input");
@@ -53,11 +53,11 @@ document.addEventListener("DOMContentLoaded", function () {
     `;
     searchResultsContainer.classList.add("active");
 
-    // Construct the API URL with query parameters
-    // Using the specified API endpoint
-    const apiUrl = `http://localhost:8000/api/v0/search/items/search?name=${encodeURIComponent(
+    // Suggestions come from the server's in-memory index; one more than we
+    // show tells us whether to offer "View all results"
+    const apiUrl = `http://localhost:8000/api/v0/search/items/suggest?q=${encodeURIComponent(
       query
-    )}&status=for_sale`;
+    )}&limit=6`;
 
     fetch(apiUrl)
       .then((response) => {
@@ -111,6 +111,24 @@ document.addEventListener("DOMContentLoaded", function () {
       const listItem = document.createElement("li");
       listItem.className = "search-result-item";
 
+      // Category suggestions link to the category's product list
+      if (item.kind === "category") {
+        listItem.innerHTML = `
+          <a href="${basePath}src/pages/productsList/productList.html?category=${encodeURIComponent(
+          item.category
+        )}">
+            <div class="search-result-content">
+              <div class="search-result-info">
+                <div class="search-result-name">${item.text}</div>
+                <div class="search-result-category">Category</div>
+              </div>
+            </div>
+          </a>
+        `;
+        resultsList.appendChild(listItem);
+        return;
+      }
+
       // Format price with 2 decimal places
       const formattedPrice = parseFloat(item.price).toFixed(2);      // Get a consistent "random" product image based on item ID
       let productImage;
@@ -132,21 +150,15 @@ document.addEventListener("DOMContentLoaded", function () {
       // Use the determined image
       productImage = `${basePath}public/resources/images/products/${imageNumber}-thumbnail.jpg`;
 
-      // Truncate description to keep it short in the dropdown
-      const shortDescription = item.description
-        ? item.description.length > 80
-          ? item.description.substring(0, 80) + "..."
-          : item.description
-        : "No description available";      listItem.innerHTML = `
+      listItem.innerHTML = `
         <a href="${basePath}src/pages/product/product.html?id=${item.item_id}">
           <div class="search-result-content">
             <div class="search-result-image">
-              <img src="${productImage}" alt="${item.name}" onerror="this.src='${basePath}public/resources/images/products/1-thumbnail.jpg'">
+              <img src="${productImage}" alt="${item.text}" onerror="this.src='${basePath}public/resources/images/products/1-thumbnail.jpg'">
             </div>
             <div class="search-result-info">
-              <div class="search-result-name">${item.name}</div>
+              <div class="search-result-name">${item.text}</div>
               <div class="search-result-category">${item.category}</div>
-              <div class="search-result-description">${shortDescription}</div>
               <div class="search-result-price">$${formattedPrice}</div>
             </div>
           </div>
@@ -162,7 +174,7 @@ document.addEventListener("DOMContentLoaded", function () {
         <a href="${basePath}src/pages/productsList/productList.html?name=${encodeURIComponent(
         searchInput.value
       )}">
-          View all ${results.length} results
+          View all results
         </a>
       `;
       resultsList.appendChild(viewAllItem);